@@ -0,0 +1,217 @@
+# email_templates.py
+# One registry for every email Trustlet sends, shared by the app (build_email /
+# create_message) and send_announcement.py.
+#
+# Each template has a subject, an HTML part and a plain-text part (sent as
+# Resend's "text" field; mail providers score HTML-only mail as more spammy).
+# The HTML part is autoescaped, so names, titles and message content typed by
+# users can't inject markup. Jinja2 is imported and each template compiled the
+# first time it is used, then reused for every later send; render_batch() renders
+# many recipients against the same compiled templates.
+
+import functools
+
+APP_URL = "https://trustlet.streamlit.app"
+
+_FOOTER_INBOX_HTML = '<hr>\n<p>To reply or view details, go to your <a href="{{ app_url }}">Trustlet inbox</a>.</p>'
+_FOOTER_INBOX_TEXT = "To reply or view details, go to your Trustlet inbox: {{ app_url }}"
+
+# name -> {"subject": ..., "html": ..., "text": ...} (Jinja2 source)
+TEMPLATES = {
+    "invite_request": {
+        "subject": "New membership request on Trustlet",
+        "html": """
+<p>{{ content | nl2br }}</p>
+<p>Log into <a href="{{ app_url }}">Trustlet</a> and select <b>Messages</b> from the dropdown menu.</p>
+""",
+        "text": """
+{{ content }}
+
+Log into Trustlet ({{ app_url }}) and select Messages from the dropdown menu.
+""",
+    },
+    "inquiry": {
+        "subject": "New inquiry about your listing '{{ listing_title or 'your listing' }}'",
+        "html": """
+<h3>📩 New Inquiry</h3>
+<p><strong>From:</strong> {{ sender_name or 'A Trustlet member' }}</p>
+<p><em>{{ content | nl2br }}</em></p>
+""" + _FOOTER_INBOX_HTML,
+        "text": """
+New inquiry from {{ sender_name or 'A Trustlet member' }}:
+
+{{ content }}
+
+""" + _FOOTER_INBOX_TEXT,
+    },
+    "reply": {
+        "subject": "You received a reply on Trustlet",
+        "html": """
+<h3>💬 New Reply</h3>
+<p><strong>From:</strong> {{ sender_name or 'A Trustlet member' }}</p>
+<p><em>{{ content | nl2br }}</em></p>
+<hr>
+<p>To reply or view the full conversation, go to your <a href="{{ app_url }}">Trustlet inbox</a>.</p>
+""",
+        "text": """
+New reply from {{ sender_name or 'A Trustlet member' }}:
+
+{{ content }}
+
+To reply or view the full conversation, go to your Trustlet inbox: {{ app_url }}
+""",
+    },
+    "system": {
+        "subject": "Trustlet notification",
+        "html": """
+<p>{{ content | nl2br }}</p>
+<p>You can view this update in your <a href="{{ app_url }}">Trustlet inbox</a>.</p>
+""",
+        "text": """
+{{ content }}
+
+You can view this update in your Trustlet inbox: {{ app_url }}
+""",
+    },
+    "alert": {
+        "subject": "New listing that matches your alert: {{ listing_title or 'a new listing' }}",
+        "html": """
+<h3>📢 New listing alert</h3>
+<p>{{ content | nl2br }}</p>
+<hr>
+<p>To change or turn off alerts, open the app and go to <b>Messages → Manage alerts</b>.</p>
+<p><a href="{{ app_url }}">Open Trustlet</a></p>
+""",
+        "text": """
+New listing alert
+
+{{ content }}
+
+To change or turn off alerts, open the app and go to Messages → Manage alerts.
+Open Trustlet: {{ app_url }}
+""",
+    },
+    "welcome": {
+        "subject": "🎉 Welcome to Trustlet – Your membership has been approved!",
+        "html": """
+<p>Hi there,</p>
+<p>Good news – your membership request has been <strong>approved</strong> 🎉</p>
+<p>You can now <a href="{{ app_url }}">log in to Trustlet</a>.</p>
+<p>The Trustlet Team</p>
+""",
+        "text": """
+Hi there,
+
+Good news – your membership request has been approved 🎉
+
+You can now log in to Trustlet: {{ app_url }}
+
+The Trustlet Team
+""",
+    },
+    "announcement": {
+        "subject": "New feature alert and share request",
+        "html": """
+<p>Dear early adopter of Trustlet,</p>
+
+<p>It's time to expand our <b>Trustlet Tribe</b>! &lt;&lt;pause for cringe&gt;&gt;</p>
+
+<p>Here is some text you can send to your Amsterdam groups if you feel like it:
+<em>"My amazing friend developed a free app ({{ app_url }}/) linking together Amsterdam lets and visitors within a friends of friends network. Use my email as the inviter {{ to_email }}."</em></p>
+
+<p>I've also just added what I think is a very important feature - <b>New Listing Alerts</b>.
+This is so that users can be notified if a listing is added that matches their filters, instead of needing to re-check the app.
+You can find it under "Browse Listings".</p>
+
+<p>Have a lovely weekend<br>
+Zuk</p>
+
+<p><small>P.S I will only rarely send an email like this to all users, but if you never want to receive anything like it again, reply with "Nee Bedankt".</small></p>
+""",
+        "text": """
+Dear early adopter of Trustlet,
+
+It's time to expand our Trustlet Tribe! <<pause for cringe>>
+
+Here is some text you can send to your Amsterdam groups if you feel like it:
+"My amazing friend developed a free app ({{ app_url }}/) linking together Amsterdam lets and visitors within a friends of friends network. Use my email as the inviter {{ to_email }}."
+
+I've also just added what I think is a very important feature - New Listing Alerts.
+This is so that users can be notified if a listing is added that matches their filters, instead of needing to re-check the app.
+You can find it under "Browse Listings".
+
+Have a lovely weekend
+Zuk
+
+P.S I will only rarely send an email like this to all users, but if you never want to receive anything like it again, reply with "Nee Bedankt".
+""",
+    },
+    "default": {
+        "subject": "New message in Trustlet inbox",
+        "html": """
+<p>{{ content | nl2br }}</p>
+<p>Check your <a href="{{ app_url }}">Trustlet inbox</a> for details.</p>
+""",
+        "text": """
+{{ content }}
+
+Check your Trustlet inbox for details: {{ app_url }}
+""",
+    },
+}
+
+_PARTS = ("subject", "html", "text")
+
+
+@functools.lru_cache(maxsize=None)
+def _environment():
+    """The Jinja2 environment, created on first render (keeps jinja2 out of the app's cold start)."""
+    from jinja2 import DictLoader, Environment, StrictUndefined
+    from markupsafe import Markup, escape
+
+    def nl2br(value):
+        return Markup("<br>\n").join(escape(line) for line in str(value or "").splitlines())
+
+    sources = {f"{name}.{part}": t[part].strip() for name, t in TEMPLATES.items() for part in _PARTS}
+    env = Environment(
+        loader=DictLoader(sources),
+        autoescape=lambda template_name: (template_name or "").endswith(".html"),
+        undefined=StrictUndefined,
+        cache_size=-1,   # never evict compiled templates
+    )
+    env.filters["nl2br"] = nl2br
+    env.globals["app_url"] = APP_URL
+    return env
+
+
+@functools.lru_cache(maxsize=None)
+def _compiled(name):
+    """(subject, html, text) compiled templates for `name`; unknown names use "default"."""
+    env = _environment()
+    if name not in TEMPLATES:
+        name = "default"
+    return tuple(env.get_template(f"{name}.{part}") for part in _PARTS)
+
+
+def _context(ctx):
+    # every template may reference these, even when the caller doesn't pass them
+    return {"content": "", "sender_name": None, "listing_title": None, "to_email": "", **ctx}
+
+
+def render(name, **ctx):
+    """Render template `name` with `ctx`. Returns (subject, html, text)."""
+    return render_batch(name, [ctx])[0]
+
+
+def render_batch(name, contexts, **shared):
+    """
+    Render `name` once per context in `contexts` (e.g. one per recipient).
+
+    `shared` is merged into every context. Returns a list of (subject, html, text).
+    """
+    subject, html, text = _compiled(name)
+    out = []
+    for ctx in contexts:
+        ctx = _context({**shared, **ctx})
+        out.append((" ".join(subject.render(ctx).split()), html.render(ctx), text.render(ctx)))
+    return out
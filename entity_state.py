@@ -0,0 +1,78 @@
+# entity_state.py
+# Bounded per-entity keys in st.session_state.
+#
+# Pages create session-state keys per listing / message / alert ("show the
+# message form for listing 42", the text typed into reply box 17, ...). Left
+# alone these accumulate for every entity a session has ever rendered. EntityState
+# hands out namespaced keys ("listing.42.show_msg"), remembers which entity each
+# key belongs to, and at the end of a rerun evicts the keys of entities that were
+# not on screen, keeping only the `cap` most recently seen ones.
+
+import pickle
+import sys
+from collections import OrderedDict
+from concurrent.futures import Future
+
+DEFAULT_CAP = 50          # off-screen entities whose keys are kept (LRU)
+
+_LRU_KEY = "_entity_lru"  # (namespace, entity_id) -> set of keys, oldest first
+
+
+class EntityState:
+    """Namespaced, LRU-bounded session-state keys for per-entity widgets and flags."""
+
+    def __init__(self, state, cap=DEFAULT_CAP):
+        self.state = state
+        self.cap = cap
+        if _LRU_KEY not in state:
+            state[_LRU_KEY] = OrderedDict()
+        self._lru = state[_LRU_KEY]
+        self._seen = set()   # entities rendered in this rerun
+
+    def key(self, namespace, entity_id, name):
+        """The session-state / widget key for `name` on entity (`namespace`, `entity_id`)."""
+        entity = (namespace, entity_id)
+        key = f"{namespace}.{entity_id}.{name}"
+        keys = self._lru.get(entity)
+        if keys is None:
+            keys = self._lru[entity] = set()
+        keys.add(key)
+        self._lru.move_to_end(entity)
+        self._seen.add(entity)
+        return key
+
+    def collect(self):
+        """
+        Evict keys of entities not rendered this rerun, beyond the `cap` most recent.
+
+        Call once at the end of a rerun. Returns the number of keys removed.
+        """
+        off_screen = [e for e in self._lru if e not in self._seen]
+        removed = 0
+        for entity in off_screen[: max(len(off_screen) - self.cap, 0)]:
+            for key in self._lru.pop(entity):
+                if key in self.state:
+                    del self.state[key]
+                    removed += 1
+        return removed
+
+
+def _approx_size(value):
+    """Pickled size of `value`, descending into containers that can't be pickled whole."""
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        pass
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_approx_size(k) + _approx_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(_approx_size(v) for v in value)
+    if isinstance(value, Future) and value.done() and not value.exception():
+        return _approx_size(value.result())
+    return sys.getsizeof(value)
+
+
+def state_size(state):
+    """(number of keys, approximate bytes) held in a session's state."""
+    keys = list(state.keys())
+    return len(keys), sum(_approx_size(state[key]) for key in keys)
@@ -0,0 +1,297 @@
+# export_data.py
+# Stream Trustlet tables to Parquet or JSONL for analytics and backups.
+#
+# Run with:
+#   python export_data.py                                   # all tables, JSONL, full export
+#   python export_data.py --tables listings messages --format parquet
+#   python export_data.py --state exports/state.json        # incremental from last run
+#   python export_data.py --since 2025-09-01T00:00:00+00:00 --rate 1
+#
+# Rows are read in keyset-paginated chunks ordered by (created_at, id), so memory
+# stays bounded by --chunk-size no matter how large a table is, and each request
+# is cheap for the database (no OFFSET scans). --rate caps requests per second so
+# an export never competes with the live app for the Supabase connection pool.
+#
+# PostgREST silently caps every response at the project's "Max rows" setting
+# (API settings; 1000 by default). --chunk-size may not exceed --max-rows, and a
+# table is only done once a request comes back empty, so a lower server cap can
+# make the export slower but never makes it stop early.
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+from supabase import create_client
+
+# -------------------------------
+# Config
+# -------------------------------
+TABLES = ("users", "listings", "messages", "alerts")
+
+DEFAULT_MAX_ROWS = 1000     # PostgREST's default cap on rows per response
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_RATE = 2.0          # requests per second
+
+SUPABASE_URL = os.environ.get("SUPABASE_URL", "")
+SUPABASE_KEY = os.environ.get("SUPABASE_KEY", "")
+
+
+# -------------------------------
+# Reading
+# -------------------------------
+class RateLimiter:
+    """Space out calls so at most `rate` happen per second (0 disables)."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._next = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        now = time.monotonic()
+        if now < self._next:
+            time.sleep(self._next - now)
+            now = self._next
+        self._next = now + self.interval
+
+
+def iter_chunks(client, table: str, since=None, chunk_size=DEFAULT_CHUNK_SIZE, limiter=None):
+    """
+    Yield lists of rows from `table` with created_at > `since`, oldest first.
+
+    Uses keyset pagination on (created_at, id): each request continues strictly
+    after the last row of the previous chunk, so rows sharing a created_at are
+    neither skipped nor duplicated. Stops only on an empty chunk: a short one may
+    just be the server's max-rows cap, not the end of the table.
+    """
+    last_created, last_id = None, None
+    while True:
+        if limiter:
+            limiter.wait()
+
+        query = client.table(table).select("*")
+        if last_created is not None:
+            query = query.or_(
+                f'created_at.gt."{last_created}",'
+                f'and(created_at.eq."{last_created}",id.gt."{last_id}")'
+            )
+        elif since:
+            query = query.gt("created_at", since)
+
+        resp = (
+            query.order("created_at", desc=False)
+            .order("id", desc=False)
+            .limit(chunk_size)
+            .execute()
+        )
+        rows = resp.data or []
+        if not rows:
+            return
+
+        yield rows
+        last_created, last_id = rows[-1]["created_at"], rows[-1]["id"]
+
+
+# -------------------------------
+# Writers
+# -------------------------------
+class JsonlWriter:
+    def __init__(self, path: str, table: str):
+        self.path = path
+        self._fh = open(path, "w", encoding="utf-8")
+
+    def write(self, rows):
+        for row in rows:
+            self._fh.write(json.dumps(row, ensure_ascii=False, default=str))
+            self._fh.write("\n")
+
+    def close(self):
+        self._fh.close()
+
+
+# Parquet column types per table, matching supabase/migrations/.
+# numeric -> float64 (never truncated to int), uuid/text -> string, jsonb -> JSON
+# string; dates and timestamps stay as the ISO strings PostgREST returns.
+PARQUET_COLUMNS = {
+    "users": {
+        "id": "string", "name": "string", "email": "string", "invited_by": "string",
+        "is_active": "bool", "created_at": "string",
+    },
+    "listings": {
+        "id": "int64", "user_id": "string", "title": "string", "home_type": "string",
+        "bedrooms": "int64", "location": "string", "street_name": "string", "cost": "float64",
+        "start_date": "string", "end_date": "string", "photo_link": "string",
+        "is_active": "bool", "created_at": "string",
+    },
+    "messages": {
+        "id": "int64", "sender_id": "string", "receiver_id": "string", "listing_id": "int64",
+        "content": "string", "message_type": "string", "status": "string",
+        "is_active": "bool", "created_at": "string",
+    },
+    "alerts": {
+        "id": "int64", "user_id": "string", "title": "string", "filters": "string",
+        "is_active": "bool", "created_at": "string",
+    },
+}
+
+
+class SchemaMismatch(ValueError):
+    """A row doesn't fit the table's declared Parquet schema (see PARQUET_COLUMNS)."""
+
+
+class ParquetWriter:
+    """
+    Append each chunk as its own row group, using the table's declared schema.
+
+    Nested values (e.g. alerts.filters) are stored as JSON strings. A row with a
+    column missing from PARQUET_COLUMNS, or a value the column type can't hold
+    exactly (e.g. 1500.5 in an int64 column), raises SchemaMismatch instead of
+    being dropped or truncated; update PARQUET_COLUMNS alongside the migrations.
+    """
+
+    def __init__(self, path: str, table: str):
+        import pyarrow  # only needed for --format parquet
+        import pyarrow.parquet
+
+        if table not in PARQUET_COLUMNS:
+            raise SchemaMismatch(f"No Parquet schema declared for table {table!r}")
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self.path = path
+        self.table = table
+        self._columns = PARQUET_COLUMNS[table]
+        self._schema = pyarrow.schema([(name, type_) for name, type_ in self._columns.items()])
+        self._writer = None
+
+    def _flatten(self, rows):
+        out = []
+        for row in rows:
+            unknown = row.keys() - self._columns.keys()
+            if unknown:
+                raise SchemaMismatch(f"{self.table}: columns not in PARQUET_COLUMNS: {sorted(unknown)}")
+            flat = {}
+            for k, v in row.items():
+                if isinstance(v, (dict, list)):
+                    v = json.dumps(v)
+                elif self._columns[k] == "int64" and isinstance(v, float):
+                    if not v.is_integer():
+                        raise SchemaMismatch(f"{self.table}.{k}: {v!r} is not an integer (row id {row.get('id')})")
+                    v = int(v)
+                flat[k] = v
+            out.append(flat)
+        return out
+
+    def write(self, rows):
+        table = self._pa.Table.from_pylist(self._flatten(rows), schema=self._schema)
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self.path, self._schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+WRITERS = {"jsonl": JsonlWriter, "parquet": ParquetWriter}
+
+
+# -------------------------------
+# Watermark state
+# -------------------------------
+def load_state(path):
+    if path and os.path.exists(path):
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    return {}
+
+
+def save_state(path, state):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(state, fh, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+# -------------------------------
+# Export
+# -------------------------------
+def export_table(client, table, out_dir, fmt, since=None, chunk_size=DEFAULT_CHUNK_SIZE, limiter=None):
+    """
+    Export one table. Returns (row_count, new_watermark, path).
+
+    The output file is only kept when at least one row was exported.
+    """
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    path = os.path.join(out_dir, f"{table}-{stamp}.{fmt}")
+    writer = WRITERS[fmt](path, table)
+
+    count, watermark = 0, since
+    try:
+        for rows in iter_chunks(client, table, since=since, chunk_size=chunk_size, limiter=limiter):
+            writer.write(rows)
+            count += len(rows)
+            watermark = rows[-1]["created_at"]
+            print(f"  {table}: {count} rows", end="\r", flush=True)
+    finally:
+        writer.close()
+
+    if count == 0 and os.path.exists(path):
+        os.remove(path)
+        path = None
+    return count, watermark, path
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Export Trustlet tables to Parquet or JSONL.")
+    p.add_argument("--tables", nargs="+", choices=TABLES, default=list(TABLES))
+    p.add_argument("--format", choices=sorted(WRITERS), default="jsonl")
+    p.add_argument("--out", default="exports", help="Output directory (default: exports)")
+    p.add_argument("--since", help="Only export rows with created_at after this ISO timestamp")
+    p.add_argument("--state", help="JSON file holding per-table watermarks; read before and updated after export")
+    p.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per request (default: 1000)")
+    p.add_argument("--max-rows", type=int, default=DEFAULT_MAX_ROWS,
+                   help="The project's PostgREST max-rows setting (default: 1000)")
+    p.add_argument("--rate", type=float, default=DEFAULT_RATE, help="Max requests per second (0 = unlimited)")
+    args = p.parse_args(argv)
+    if not 0 < args.chunk_size <= args.max_rows:
+        p.error(f"--chunk-size must be between 1 and --max-rows ({args.max_rows}); "
+                "PostgREST returns at most max-rows rows per request")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if not (SUPABASE_URL and SUPABASE_KEY):
+        raise RuntimeError(
+            "Missing credentials. Set SUPABASE_URL and SUPABASE_KEY "
+            "as environment variables before running this script."
+        )
+
+    client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    limiter = RateLimiter(args.rate)
+    os.makedirs(args.out, exist_ok=True)
+    state = load_state(args.state)
+
+    for table in args.tables:
+        since = args.since or state.get(table)
+        print(f"Exporting {table}" + (f" since {since}" if since else "") + " ...")
+        count, watermark, path = export_table(
+            client, table, args.out, args.format,
+            since=since, chunk_size=args.chunk_size, limiter=limiter,
+        )
+        print(f"  {table}: {count} rows" + (f" → {path}" if path else ""))
+
+        if args.state and watermark:
+            state[table] = watermark
+            save_state(args.state, state)
+
+    print("Done.")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
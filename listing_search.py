@@ -0,0 +1,123 @@
+# listing_search.py
+# Process-wide inverted index for searching listing titles and street names.
+#
+# Built once over the snapshot of active listings and rebuilt only with the
+# snapshot (when a listing is inserted or toggled, or the snapshot expires), so a
+# search costs a few dict lookups instead of a database round trip or a scan over
+# every listing. Each query word matches
+#   - exactly ("canal" -> "canal"),
+#   - as a prefix ("jord" -> "jordaan"), or
+#   - with one typo ("jordan" -> "jordaan", "kanal" -> "canal") for words of
+#     4+ letters, using a deletion index (SymSpell-style) so candidates are found
+#     without comparing against the whole vocabulary.
+# Every word of the query must match; results are ranked by how well and where
+# (title beats street) the words matched.
+
+import bisect
+import re
+import unicodedata
+
+FIELD_WEIGHTS = {"title": 2.0, "street_name": 1.0}
+
+EXACT, PREFIX, FUZZY = 1.0, 0.6, 0.4   # score per match kind, times the field weight
+MIN_FUZZY_LEN = 4
+
+_WORD = re.compile(r"[0-9a-z]+")
+
+
+def tokenize(text):
+    """Lowercase, accent-free words: 'Café Prinsengracht-12' -> ['cafe', 'prinsengracht', '12']."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return _WORD.findall(text)
+
+
+def _deletes(word):
+    """`word` plus every variant with one character removed."""
+    return {word} | {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+def _within_one_edit(a, b):
+    """True if a and b differ by at most one insert, delete, substitution or adjacent swap."""
+    if a == b:
+        return True
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    if la == lb:
+        diff = [i for i in range(la) if a[i] != b[i]]
+        if len(diff) == 1:
+            return True
+        return len(diff) == 2 and diff[1] == diff[0] + 1 and a[diff[0]] == b[diff[1]] and a[diff[1]] == b[diff[0]]
+    if la > lb:
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    return a[i:] == b[i + 1:]
+
+
+class ListingSearchIndex:
+    """Inverted index over listing titles and street names with prefix and typo-tolerant matching."""
+
+    def __init__(self, listings):
+        self._postings = {}   # word -> {listing_id: field weight}
+        self._order = {}      # listing_id -> position in the snapshot (tie-break)
+        for pos, listing in enumerate(listings):
+            self._order[listing.id] = pos
+            for field, weight in FIELD_WEIGHTS.items():
+                for word in tokenize(getattr(listing, field, "")):
+                    ids = self._postings.setdefault(word, {})
+                    ids[listing.id] = max(ids.get(listing.id, 0.0), weight)
+
+        self._vocab = sorted(self._postings)
+        self._delete_index = {}   # deletion variant -> words it came from
+        for word in self._vocab:
+            if len(word) >= MIN_FUZZY_LEN:
+                for variant in _deletes(word):
+                    self._delete_index.setdefault(variant, set()).add(word)
+
+    def __len__(self):
+        return len(self._order)
+
+    def _matches(self, term):
+        """{word: match score} for every vocabulary word that `term` matches."""
+        found = {}
+        lo = bisect.bisect_left(self._vocab, term)
+        for word in self._vocab[lo:]:
+            if not word.startswith(term):
+                break
+            found[word] = EXACT if word == term else PREFIX
+        if len(term) >= MIN_FUZZY_LEN:
+            for variant in _deletes(term):
+                for word in self._delete_index.get(variant, ()):
+                    if word not in found and _within_one_edit(term, word):
+                        found[word] = FUZZY
+        return found
+
+    def search(self, query):
+        """
+        Listing ids matching every word of `query`, best first, as [(listing_id, score), ...].
+
+        An empty query returns [].
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        scores = None
+        for term in dict.fromkeys(terms):
+            term_scores = {}
+            for word, kind in self._matches(term).items():
+                for listing_id, weight in self._postings[word].items():
+                    s = kind * weight
+                    if s > term_scores.get(listing_id, 0.0):
+                        term_scores[listing_id] = s
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {i: scores[i] + s for i, s in term_scores.items() if i in scores}
+            if not scores:
+                return []
+
+        return sorted(scores.items(), key=lambda item: (-item[1], self._order[item[0]]))
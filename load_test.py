@@ -0,0 +1,624 @@
+# load_test.py
+# Multi-session load test for trustlet_app.py against an in-memory stand-in backend.
+#
+# Run with:
+#   python load_test.py                                  # 1, 5, 10, 25 sessions
+#   python load_test.py --sessions 1 10 50 --steps 30 --latency-ms 40 --jitter-ms 20
+#
+# Every simulated session is a Streamlit AppTest driving the real app script:
+# it logs in, then performs random steps (browse with random filters, open a
+# listing, send an inquiry, read the inbox, approve a pending invite). Supabase
+# and Resend are replaced by FakeSupabase / a no-op sender, with configurable
+# latency injected into every backend call. For each session count we report
+# p50/p95/p99 rerun latency, backend calls per rerun, process memory and the
+# average size of each session's st.session_state. Each session count runs in a
+# fresh subprocess, so its memory figures aren't inflated by earlier levels:
+# "rss MB" is the process after the level, "+rss MB" the growth during it.
+#
+# Before the sweep it prints an import-time profile (python -X importtime) of
+# the app's top-level imports and of the dependencies it loads lazily, so
+# cold-start regressions show up in the same output.
+
+import argparse
+import ast
+import contextlib
+import json
+import logging
+import random
+import os
+import resource
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from unittest import mock
+from urllib import parse
+
+APP_FILE = "trustlet_app.py"
+LAZY_IMPORTS = ["supabase", "resend", "jinja2"]   # imported by the app on first use, not at startup
+NEIGHBOURHOODS = ["Oost", "ZuidOost", "Centrum", "Westerpark", "Oud-West", "Oud-Zuid", "Noord"]
+HOME_TYPES = ["Room only", "Entire home"]
+
+
+# -------------------------------
+# Stand-in backend
+# -------------------------------
+class FakeResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class FakeQuery:
+    """The subset of the postgrest query builder that the app uses."""
+
+    def __init__(self, backend, table, client=None):
+        self.backend = backend
+        self.client = client
+        self.table = table
+        self.columns = None
+        self.want_count = False
+        self.filters = []
+        self.orders = []
+        self.limit_n = None
+        self.op = "select"
+        self.payload = None
+
+    # --- verbs ---
+    def select(self, columns="*", count=None):
+        if columns.strip() != "*":
+            self.columns = [c.strip() for c in columns.split(",")]
+        self.want_count = count is not None
+        return self
+
+    def insert(self, payload):
+        self.op, self.payload = "insert", payload
+        return self
+
+    def update(self, payload):
+        self.op, self.payload = "update", payload
+        return self
+
+    def delete(self):
+        self.op = "delete"
+        return self
+
+    # --- filters / modifiers ---
+    def eq(self, col, val):
+        self.filters.append(lambda r: r.get(col) == val)
+        return self
+
+    def in_(self, col, vals):
+        vals = set(vals)
+        self.filters.append(lambda r: r.get(col) in vals)
+        return self
+
+    def lte(self, col, val):
+        self.filters.append(lambda r: r.get(col) is not None and r[col] <= val)
+        return self
+
+    def gte(self, col, val):
+        self.filters.append(lambda r: r.get(col) is not None and r[col] >= val)
+        return self
+
+    def lt(self, col, val):
+        self.filters.append(lambda r: r.get(col) is not None and r[col] < val)
+        return self
+
+    def gt(self, col, val):
+        self.filters.append(lambda r: r.get(col) is not None and r[col] > val)
+        return self
+
+    def order(self, col, desc=False):
+        self.orders.append((col, desc))
+        return self
+
+    def limit(self, n):
+        self.limit_n = n
+        return self
+
+    def _matches(self, row):
+        return all(f(row) for f in self.filters)
+
+    def execute(self):
+        self.backend.hit()
+        with self.backend.lock:
+            if self.client is not None and self.client.session_user is not None:
+                self.backend.user_session_calls += 1
+            rows = self.backend.tables.setdefault(self.table, [])
+
+            if self.op == "insert":
+                new = self.backend.new_row(self.table, self.payload)
+                rows.append(new)
+                return FakeResponse([dict(new)])
+
+            if self.op == "update":
+                hit = [r for r in rows if self._matches(r)]
+                for r in hit:
+                    r.update(self.payload)
+                return FakeResponse([dict(r) for r in hit])
+
+            if self.op == "delete":
+                hit = [r for r in rows if self._matches(r)]
+                self.backend.tables[self.table] = [r for r in rows if not self._matches(r)]
+                return FakeResponse([dict(r) for r in hit])
+
+            result = [r for r in rows if self._matches(r)]
+
+        for col, desc in reversed(self.orders):
+            result.sort(key=lambda r: (r.get(col) is None, r.get(col)), reverse=desc)
+        if self.limit_n is not None:
+            result = result[: self.limit_n]
+        if self.columns:
+            result = [{c: r.get(c) for c in self.columns} for r in result]
+        else:
+            result = [dict(r) for r in result]
+        return FakeResponse(result, count=len(result) if self.want_count else None)
+
+
+class FakeUser:
+    def __init__(self, user_id):
+        self.id = user_id
+
+
+class FakeAuthResponse:
+    def __init__(self, user):
+        self.user = user
+        self.error = None
+
+
+class FakeAuth:
+    def __init__(self, client):
+        self.client = client
+        self.backend = client.backend
+
+    def sign_in_with_password(self, creds):
+        self.backend.hit()
+        with self.backend.lock:
+            row = next((u for u in self.backend.tables["users"] if u["email"] == creds["email"]), None)
+        if row:
+            # like supabase-py, later requests from this client carry the user's JWT
+            self.client.session_user = row["id"]
+        return FakeAuthResponse(FakeUser(row["id"]) if row else None)
+
+    def sign_up(self, creds):
+        self.backend.hit()
+        return FakeAuthResponse(FakeUser(str(uuid.uuid4())))
+
+
+class FakeClient:
+    """One create_client() result: shares the backend's data, but has its own auth session."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.session_user = None
+        self.auth = FakeAuth(self)
+
+    def table(self, name):
+        return FakeQuery(self.backend, name, client=self)
+
+
+class FakeSupabase:
+    """
+    In-memory stand-in for the Supabase backend; connect() plays create_client().
+
+    Every executed request sleeps for `latency` (+ uniform `jitter`) seconds to
+    mimic a network round trip, and is counted so we can report calls per rerun.
+    Queries sent by a client that has signed someone in are counted separately
+    (user_session_calls): the app must never run its queries as a user.
+    """
+
+    def __init__(self, latency=0.03, jitter=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.user_session_calls = 0
+        self.tables = {"users": [], "listings": [], "messages": [], "alerts": []}
+        self._ids = {}
+        self._rng = random.Random(seed)
+
+    def connect(self, *args, **kwargs):
+        return FakeClient(self)
+
+    def hit(self):
+        with self.lock:
+            self.calls += 1
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def new_row(self, table, payload):
+        row = {"is_active": True, "created_at": datetime.now(timezone.utc).isoformat()}
+        row.update(payload)
+        if "id" not in row:
+            self._ids[table] = self._ids.get(table, 0) + 1
+            row["id"] = self._ids[table]
+        return row
+
+    def seed(self, n_sessions, n_listings, rng):
+        """Create one login per session plus listings, inbox messages, alerts and pending invites."""
+        now = datetime.now(timezone.utc)
+        users = self.tables["users"]
+        founder = str(uuid.uuid4())
+        users.append({"id": founder, "name": "Founder", "email": "founder@example.com",
+                      "invited_by": None, "is_active": True, "created_at": (now - timedelta(days=400)).isoformat()})
+
+        for i in range(n_sessions):
+            uid = str(uuid.uuid4())
+            inviter = rng.choice([u for u in users if u["is_active"]])["id"]
+            users.append({"id": uid, "name": f"Member {i}", "email": f"member{i}@example.com",
+                          "invited_by": inviter, "is_active": True,
+                          "created_at": (now - timedelta(days=rng.randint(1, 365))).isoformat()})
+            # A pending applicant for each member so approvals have something to approve
+            pid = str(uuid.uuid4())
+            users.append({"id": pid, "name": f"Applicant {i}", "email": f"applicant{i}@example.com",
+                          "invited_by": uid, "is_active": False, "created_at": now.isoformat()})
+            self.tables["messages"].append(self.new_row("messages", {
+                "sender_id": pid, "receiver_id": uid, "content": f"Applicant {i} has requested to join Trustlet.",
+                "message_type": "invite_request", "status": "pending", "listing_id": None}))
+
+        members = [u for u in users if u["is_active"]]
+        today = date.today()
+        for i in range(n_listings):
+            start = today + timedelta(days=rng.randint(0, 120))
+            self.tables["listings"].append(self.new_row("listings", {
+                "user_id": rng.choice(members)["id"],
+                "title": f"Listing {i}",
+                "home_type": rng.choice(HOME_TYPES),
+                "bedrooms": rng.randint(1, 4),
+                "location": rng.choice(NEIGHBOURHOODS),
+                "street_name": f"Street {i}",
+                "cost": rng.randint(300, 3000),
+                "start_date": start.isoformat(),
+                "end_date": (start + timedelta(days=rng.randint(3, 60))).isoformat(),
+                "photo_link": "",
+                "is_active": rng.random() < 0.9,
+            }))
+
+        listings = self.tables["listings"]
+        for m in members:
+            for _ in range(rng.randint(0, 5)):
+                lst = rng.choice(listings)
+                self.tables["messages"].append(self.new_row("messages", {
+                    "sender_id": rng.choice(members)["id"], "receiver_id": m["id"],
+                    "content": "Hi, is this still available?", "message_type": "inquiry",
+                    "status": "sent", "listing_id": lst["id"]}))
+            if rng.random() < 0.5:
+                self.tables["alerts"].append(self.new_row("alerts", {
+                    "user_id": m["id"], "title": "My listing alert",
+                    "filters": {"home_type": rng.choice(HOME_TYPES + [None]), "suburbs": [],
+                                "max_cost": None, "desired_start": None, "desired_end": None}}))
+
+
+# -------------------------------
+# Simulated sessions
+# -------------------------------
+@contextlib.contextmanager
+def shared_runtime(secrets):
+    """
+    Install the process-wide pieces AppTest normally sets up per run.
+
+    Stock AppTest creates a mock Runtime and swaps st.secrets at the start of
+    every run and resets both at the end, so overlapping runs in different
+    threads tear each other's globals down. ConcurrentAppTest skips that and
+    relies on this context manager to install them once for the whole sweep.
+    """
+    import streamlit as st
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.secrets import Secrets
+    from streamlit.testing.v1.util import patch_config_options
+
+    runtime = mock.MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    saved_secrets = st.secrets
+    new_secrets = Secrets()
+    new_secrets._secrets = secrets
+    ctx_logger = logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context")
+    saved_level = ctx_logger.level
+    ctx_logger.setLevel(logging.ERROR)  # "missing ScriptRunContext" noise from harness threads
+    Runtime._instance, st.secrets = runtime, new_secrets
+    try:
+        with patch_config_options({"global.appTest": True}):
+            yield
+    finally:
+        Runtime._instance, st.secrets = None, saved_secrets
+        ctx_logger.setLevel(saved_level)
+
+
+def _concurrent_app_test_class():
+    from streamlit.runtime.pages_manager import PagesManager
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import AppTest
+    from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+    # One compiled script shared by every session, as on a real server. This also
+    # avoids compiling the same file from several threads at once.
+    script_cache = ScriptCache()
+
+    class ConcurrentAppTest(AppTest):
+        """AppTest whose runs may overlap in threads (see shared_runtime)."""
+
+        def _run(self, widget_state=None, timeout=None):
+            pages_manager = PagesManager(self._script_path, script_cache, setup_watcher=False)
+            runner = LocalScriptRunner(
+                self._script_path, self.session_state, pages_manager,
+                args=self.args, kwargs=self.kwargs,
+            )
+            runner._script_cache = script_cache
+            self._tree = runner.run(
+                widget_state, self.query_params,
+                self.default_timeout if timeout is None else timeout, self._page_hash,
+            )
+            self._tree._runner = self
+            self.query_params = parse.parse_qs(runner.event_data[-1]["client_state"].query_string)
+            return self
+
+    return ConcurrentAppTest
+
+
+def _find(widgets, label=None, prefix=None):
+    for w in widgets:
+        if label is not None and w.label == label:
+            return w
+        if prefix is not None and (w.label or "").startswith(prefix):
+            return w
+    return None
+
+
+class Session:
+    """One simulated browser tab driving the app through AppTest."""
+
+    def __init__(self, index, app_test_class, rng, timeout):
+        self.index = index
+        self.rng = rng
+        self.timeout = timeout
+        self.latencies = []
+        self.at = app_test_class(APP_FILE, default_timeout=timeout)
+
+    def _run(self, action):
+        t0 = time.perf_counter()
+        action.run(timeout=self.timeout)
+        self.latencies.append(time.perf_counter() - t0)
+        if self.at.exception:
+            raise RuntimeError(f"session {self.index}: {self.at.exception[0].message}")
+
+    def _goto(self, page):
+        box = _find(self.at.selectbox, label="Choose Action")
+        if box is not None and box.value != page:
+            self._run(box.set_value(page))
+
+    def login(self):
+        self._run(self.at)
+        self._run(_find(self.at.selectbox, label="Menu").set_value("Login"))
+        _find(self.at.text_input, label="Email").input(f"member{self.index}@example.com")
+        _find(self.at.text_input, label="Password").input("password")
+        self._run(_find(self.at.button, label="Login").click())
+
+    # --- steps ---
+    def browse(self):
+        self._goto("Browse Listings")
+        _find(self.at.selectbox, label="Home Type").set_value(self.rng.choice(["All"] + HOME_TYPES))
+        _find(self.at.number_input, label="Max cost (€)").set_value(self.rng.choice([0, 0, 1000, 2000]))
+        _find(self.at.multiselect, label="Neighborhood(s)").set_value(
+            self.rng.sample(NEIGHBOURHOODS, self.rng.randint(0, 2)))
+        _find(self.at.text_input, label="🔎 Search titles and streets").input(
+            self.rng.choice(["", "", "listing", f"street {self.rng.randint(0, 50)}", "lsting"]))
+        if self.rng.random() < 0.3:
+            _find(self.at.date_input, label="Earliest start date").set_value(
+                date.today() + timedelta(days=self.rng.randint(0, 60)))
+        self._run(self.at)
+
+    def open_listing(self):
+        self._goto("Browse Listings")
+        buttons = [b for b in self.at.button if b.label == "Send Message"]
+        if buttons:
+            self._run(self.rng.choice(buttons).click())
+
+    def send_inquiry(self):
+        self.open_listing()
+        area = _find(self.at.text_area, prefix="Message for listing")
+        submit = _find(self.at.button, label="Submit")
+        if area is not None and submit is not None:
+            area.input("Hello! Are these dates still free?")
+            self._run(submit.click())
+
+    def inbox(self):
+        self._goto("Messages")
+        self._run(self.at)
+
+    def approve(self):
+        self._goto("Messages")
+        button = _find(self.at.button, prefix="Approve ")
+        if button is not None:
+            self._run(button.click())
+
+    STEPS = [(browse, 4), (open_listing, 2), (send_inquiry, 1), (inbox, 3), (approve, 1)]
+
+    def run(self, steps):
+        self.login()
+        funcs, weights = zip(*self.STEPS)
+        for _ in range(steps):
+            self.rng.choices(funcs, weights=weights)[0](self)
+        return self.latencies
+
+    def state_kb(self):
+        """Approximate size of this session's st.session_state after the run."""
+        from entity_state import state_size
+
+        return state_size(self.at.session_state.filtered_state)[1] / 1024
+
+
+# -------------------------------
+# Import-time profile
+# -------------------------------
+def app_imports(path=APP_FILE):
+    """Absolute modules imported at the top level of the app script, in order."""
+    with open(path, encoding="utf-8") as fh:
+        tree = ast.parse(fh.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def import_profile(modules):
+    """
+    Import `modules` in a fresh interpreter under -X importtime.
+
+    Returns (total_ms, [(top-level module, cumulative_ms), ...] slowest first).
+    """
+    code = "; ".join(f"import {m}" for m in modules)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(APP_FILE)),
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"importing {modules} failed:\n{proc.stderr[-2000:]}")
+
+    # Only top-level entries for the requested modules: nested imports are indented
+    # further, and interpreter startup (site, encodings, ...) is not the app's cost
+    wanted = {m.split(".")[0] for m in modules}
+    top = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if name[1:2] != " " and name.strip().split(".")[0] in wanted:
+            top.append((name.strip(), int(cumulative) / 1000))
+    top.sort(key=lambda item: item[1], reverse=True)
+    return sum(ms for _, ms in top), top
+
+
+def print_import_profile(limit=8):
+    total, top = import_profile(app_imports())
+    print(f"Startup imports of {APP_FILE}: {total:.0f} ms")
+    for name, ms in top[:limit]:
+        print(f"  {ms:>8.1f} ms  {name}")
+    lazy_total, _ = import_profile(LAZY_IMPORTS)
+    print(f"Deferred to first use ({', '.join(LAZY_IMPORTS)}): {lazy_total:.0f} ms")
+    print()
+
+
+# -------------------------------
+# Reporting
+# -------------------------------
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100.0
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def rss_mb():
+    """Current resident set size in MB (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_level(n_sessions, args):
+    rng = random.Random(args.seed)
+    backend = FakeSupabase(latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000, seed=args.seed)
+    backend.seed(n_sessions, args.listings, rng)
+    secrets = {
+        "supabase": {"url": "http://localhost", "key": "load-test"},
+        "resend": {"api_key": "load-test", "from_email": "loadtest@example.com"},
+    }
+
+    app_test_class = _concurrent_app_test_class()
+    rss_before = rss_mb()
+
+    with mock.patch("supabase.create_client", side_effect=backend.connect), \
+            mock.patch("resend.Emails.send", return_value={"id": "load-test"}), \
+            shared_runtime(secrets):
+        sessions = [Session(i, app_test_class, random.Random(args.seed + i), args.timeout)
+                    for i in range(n_sessions)]
+        backend.calls = 0
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=n_sessions) as pool:
+            results = list(pool.map(lambda s: s.run(args.steps), sessions))
+        wall = time.perf_counter() - t0
+
+    latencies = [x for r in results for x in r]
+    state_kb = [s.state_kb() for s in sessions]
+    return {
+        "sessions": n_sessions,
+        "reruns": len(latencies),
+        "p50": percentile(latencies, 50) * 1000,
+        "p95": percentile(latencies, 95) * 1000,
+        "p99": percentile(latencies, 99) * 1000,
+        "calls": backend.calls / max(len(latencies), 1),
+        "rss": rss_mb(),
+        "rss_delta": rss_mb() - rss_before,
+        "user_session_calls": backend.user_session_calls,
+        "state": sum(state_kb) / len(state_kb),
+        "wall": wall,
+    }
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Load-test trustlet_app.py with simulated sessions.")
+    p.add_argument("--sessions", type=int, nargs="+", default=[1, 5, 10, 25], help="Session counts to sweep")
+    p.add_argument("--steps", type=int, default=20, help="Random steps per session after login")
+    p.add_argument("--latency-ms", type=float, default=30.0, help="Injected latency per backend call")
+    p.add_argument("--jitter-ms", type=float, default=10.0, help="Extra uniform random latency per call")
+    p.add_argument("--listings", type=int, default=200, help="Listings to seed")
+    p.add_argument("--timeout", type=float, default=120.0, help="Per-rerun timeout (s)")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--no-import-profile", action="store_true", help="Skip the import-time profile")
+    p.add_argument("--level", type=int, help=argparse.SUPPRESS)  # internal: run one level, print JSON
+    return p.parse_args(argv)
+
+
+def run_level_subprocess(n_sessions, argv):
+    """run_level() in a fresh interpreter, so memory from earlier levels isn't counted."""
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), *argv, "--level", str(n_sessions)],
+        capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        sys.exit(f"Level with {n_sessions} sessions failed:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    args = parse_args(argv)
+    if args.level is not None:
+        print(json.dumps(run_level(args.level, args)))
+        return
+    if not args.no_import_profile:
+        print_import_profile()
+    print(f"Backend latency {args.latency_ms:.0f}±{args.jitter_ms:.0f} ms, "
+          f"{args.listings} listings, {args.steps} steps/session")
+    print(f"{'sessions':>8} {'reruns':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'calls/rerun':>11} {'rss MB':>8} {'+rss MB':>8} {'state KB':>9} {'wall s':>7}")
+    for n in args.sessions:
+        r = run_level_subprocess(n, argv)
+        print(f"{r['sessions']:>8} {r['reruns']:>7} {r['p50']:>8.1f} {r['p95']:>8.1f} {r['p99']:>8.1f} "
+              f"{r['calls']:>11.1f} {r['rss']:>8.1f} {r['rss_delta']:>8.1f} {r['state']:>9.1f} {r['wall']:>7.1f}")
+        if r["user_session_calls"]:
+            print(f"{'':>8} ⚠️  {r['user_session_calls']} queries ran on a client holding a user's session")
+
+
+if __name__ == "__main__":
+    main()
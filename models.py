@@ -0,0 +1,179 @@
+# models.py
+# Typed, compact row models for the Supabase tables used by trustlet_app.py.
+#
+# Rows arrive from PostgREST as plain JSON dicts with dates as strings. Each
+# model converts a row exactly once (from_row): dates are parsed, derived values
+# such as nights and cost per night are precomputed, and display strings are
+# formatted up front, so pages that rerun many times never parse the same
+# value twice. slots=True keeps per-row memory small in the session caches.
+
+from dataclasses import dataclass, field
+from datetime import date, datetime
+
+
+def _parse_date(value):
+    """'YYYY-MM-DD' (or a date) -> date; None stays None."""
+    if value is None or isinstance(value, date):
+        return value
+    return datetime.strptime(value[:10], "%Y-%m-%d").date()
+
+
+def _parse_timestamp(value):
+    """ISO timestamp as returned by Supabase ('...Z' or '+00:00') -> datetime."""
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace("Z", ""))
+
+
+@dataclass(slots=True)
+class User:
+    id: str
+    name: str = "Unknown"
+    email: str = ""
+    invited_by: str | None = None
+    is_active: bool = False
+    created_at: datetime | None = None
+    member_since: str = ""          # e.g. "Sep 2025"
+
+    @classmethod
+    def from_row(cls, row):
+        created_at = _parse_timestamp(row.get("created_at"))
+        return cls(
+            id=row["id"],
+            name=row.get("name") or "Unknown",
+            email=row.get("email") or "",
+            invited_by=row.get("invited_by"),
+            is_active=bool(row.get("is_active")),
+            created_at=created_at,
+            member_since=created_at.strftime("%b %Y") if created_at else "",
+        )
+
+
+@dataclass(slots=True)
+class Listing:
+    id: int
+    user_id: str
+    title: str
+    home_type: str
+    bedrooms: int
+    location: str
+    street_name: str
+    cost: float
+    start_date: date
+    end_date: date
+    photo_link: str = ""
+    is_active: bool = True
+    created_at: str | None = None
+    # derived once in from_row
+    nights: int = 0
+    per_night: float = 0.0
+    start_iso: str = ""             # "YYYY-MM-DD", for alert messages and the owner's list
+    end_iso: str = ""
+    start_fmt: str = ""             # "dd/mm/yy", for Browse
+    end_fmt: str = ""
+
+    @classmethod
+    def from_row(cls, row):
+        start, end = _parse_date(row["start_date"]), _parse_date(row["end_date"])
+        nights = (end - start).days
+        cost = row.get("cost") or 0
+        return cls(
+            id=row["id"],
+            user_id=row["user_id"],
+            title=row.get("title") or "Untitled listing",
+            home_type=row.get("home_type") or "",
+            bedrooms=row.get("bedrooms") or 1,
+            location=row.get("location") or "",
+            street_name=row.get("street_name") or "",
+            cost=cost,
+            start_date=start,
+            end_date=end,
+            photo_link=row.get("photo_link") or "",
+            is_active=bool(row.get("is_active")),
+            created_at=row.get("created_at"),
+            nights=nights,
+            per_night=cost / nights if nights > 0 else cost,
+            start_iso=start.isoformat(),
+            end_iso=end.isoformat(),
+            start_fmt=start.strftime("%d/%m/%y"),
+            end_fmt=end.strftime("%d/%m/%y"),
+        )
+
+
+@dataclass(slots=True)
+class Message:
+    id: int
+    sender_id: str
+    receiver_id: str
+    content: str = ""
+    message_type: str = "uncategorized"
+    status: str = "sent"
+    listing_id: int | None = None
+    is_active: bool = True
+    created_at: str | None = None
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(
+            id=row["id"],
+            sender_id=row["sender_id"],
+            receiver_id=row["receiver_id"],
+            content=row.get("content") or "",
+            message_type=row.get("message_type") or "uncategorized",
+            status=row.get("status") or "sent",
+            listing_id=row.get("listing_id"),
+            is_active=bool(row.get("is_active", True)),
+            created_at=row.get("created_at"),
+        )
+
+
+@dataclass(slots=True)
+class Alert:
+    id: int
+    user_id: str
+    title: str = "Listing alert"
+    filters: dict = field(default_factory=dict)
+    is_active: bool = True
+    created_at: str | None = None
+    # filters parsed once in from_row
+    home_type: str | None = None
+    suburbs: frozenset = frozenset()
+    max_cost: float | None = None
+    desired_start: date | None = None
+    desired_end: date | None = None
+
+    @classmethod
+    def from_row(cls, row):
+        f = row.get("filters") or {}
+        return cls(
+            id=row["id"],
+            user_id=row["user_id"],
+            title=row.get("title") or "Listing alert",
+            filters=f,
+            is_active=bool(row.get("is_active", True)),
+            created_at=row.get("created_at"),
+            home_type=f.get("home_type") or None,
+            suburbs=frozenset(f.get("suburbs") or ()),
+            max_cost=f.get("max_cost") or None,
+            desired_start=_parse_date(f.get("desired_start")),
+            desired_end=_parse_date(f.get("desired_end")),
+        )
+
+    def matches(self, listing):
+        """Same semantics as the Browse Listings filters."""
+        if self.home_type and listing.home_type != self.home_type:
+            return False
+        if self.suburbs and listing.location not in self.suburbs:
+            return False
+        if self.max_cost and listing.cost > self.max_cost:
+            return False
+        if self.desired_start and listing.end_date < self.desired_start:
+            return False
+        if self.desired_end and listing.start_date > self.desired_end:
+            return False
+        return True
+
+
+def from_rows(model, rows):
+    """Convert a list of raw rows (e.g. `response.data`) into `model` instances."""
+    return [model.from_row(r) for r in rows or []]
@@ -0,0 +1,35 @@
+# prefetch.py
+# Background loading of a user's working set right after login.
+#
+# Pages in trustlet_app.py load their data on first render, one after another.
+# Right after login we already know what the user will most likely open next
+# (inbox, alerts, their own listings, the first page of Browse), so we start all
+# of those requests at once on the shared query executor (see query_batch.py).
+# The futures go into session state; the first page that needs a result
+# just waits on its future, which by then has usually finished.
+
+from concurrent.futures import Future
+
+from query_batch import submit
+
+
+def prefetch(loaders):
+    """
+    Start every loader concurrently and return {key: Future} immediately.
+
+    `loaders` maps cache keys to zero-argument callables. Loaders must not call
+    Streamlit APIs: they run on worker threads outside the script run.
+    """
+    return {key: submit(loader) for key, loader in loaders.items()}
+
+
+def resolve(value):
+    """
+    Return the result if `value` is a Future, otherwise `value` itself.
+
+    Raises whatever the loader raised, so callers can fall back to loading the
+    data themselves.
+    """
+    if isinstance(value, Future):
+        return value.result()
+    return value
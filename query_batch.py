@@ -0,0 +1,96 @@
+# query_batch.py
+# Run a page's independent reads concurrently within a single rerun.
+#
+# A page declares the reads it needs up front, runs them together and renders
+# once they have all returned, so its latency is the slowest query rather than
+# the sum of all of them:
+#
+#     batch = QueryBatch()
+#     batch.add("inbox", fetch_inbox, user_id)
+#     batch.add("alerts", fetch_user_alerts, user_id)
+#     results = batch.run()
+#
+# All batches (and the login prefetch) share one bounded executor, so a busy
+# server never opens more than MAX_WORKERS concurrent requests to Supabase.
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_WORKERS = 8
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="trustlet-query")
+_worker = threading.local()
+
+
+def _script_run_ctx():
+    """The current Streamlit script context, if any (None outside `streamlit run`)."""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return None
+    return get_script_run_ctx(suppress_warning=True)
+
+
+def _attach_ctx(thread, ctx):
+    """Attach (or, with ctx=None, detach) a ScriptRunContext to a worker thread."""
+    from streamlit.runtime.scriptrunner_utils.script_run_context import SCRIPT_RUN_CONTEXT_ATTR_NAME
+    setattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME, ctx)
+
+
+def submit(fn, *args, ctx=None, **kwargs):
+    """
+    Run `fn(*args, **kwargs)` on the shared executor and return its Future.
+
+    If `ctx` (a ScriptRunContext) is given, it is attached to the worker thread
+    for the duration of the call so Streamlit calls inside `fn` (st.error etc.)
+    reach the right session.
+    """
+    def call():
+        thread = threading.current_thread()
+        _worker.active = True
+        if ctx is not None:
+            _attach_ctx(thread, ctx)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _worker.active = False
+            if ctx is not None:
+                _attach_ctx(thread, None)
+
+    return _executor.submit(call)
+
+
+class QueryBatch:
+    """A set of independent reads that are started together and joined before rendering."""
+
+    def __init__(self):
+        self._calls = {}
+
+    def __len__(self):
+        return len(self._calls)
+
+    def add(self, key, fn, *args, **kwargs):
+        """Declare a read; its result is returned under `key` by run()."""
+        self._calls[key] = (fn, args, kwargs)
+        return key
+
+    def run(self):
+        """
+        Run every declared read concurrently and return {key: result}.
+
+        Waits for all reads to finish, then re-raises the first failure (in
+        declaration order), matching what running them one by one would do.
+        Batches started from inside a worker thread run inline, so nested
+        batches can't deadlock the shared pool.
+        """
+        calls, self._calls = self._calls, {}
+        if len(calls) <= 1 or getattr(_worker, "active", False):
+            return {key: fn(*args, **kwargs) for key, (fn, args, kwargs) in calls.items()}
+
+        ctx = _script_run_ctx()
+        futures = {key: submit(fn, *args, ctx=ctx, **kwargs) for key, (fn, args, kwargs) in calls.items()}
+        errors = [f.exception() for f in futures.values()]
+        for error in errors:
+            if error is not None:
+                raise error
+        return {key: future.result() for key, future in futures.items()}
@@ -6,6 +6,8 @@ from supabase import create_client
 import resend
 import time
 
+import email_templates
+
 # -------------------------------
 # Config
 # -------------------------------
@@ -50,41 +52,23 @@ if not (SUPABASE_URL and SUPABASE_KEY and RESEND_API_KEY):
 supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
 resend.api_key = RESEND_API_KEY
 
-def send_email(to_email: str, subject: str, body_html: str):
-    resend.Emails.send({
+def send_email(to_email: str, subject: str, body_html: str, body_text: str | None = None):
+    payload = {
         "from": f"{FROM_NAME} <{FROM_EMAIL}>",
         "to": [to_email],
         "subject": subject,
         "html": body_html
-    })
+    }
+    if body_text:
+        payload["text"] = body_text
+    resend.Emails.send(payload)
 
 # -------------------------------
 # Email content
 # -------------------------------
-SUBJECT = "New feature alert and share request"
-
-# Use [to_email] as the placeholder we’ll replace per recipient
-BODY_TEMPLATE = """
-<p>Dear early adopter of Trustlet,</p>
-
-<p>It's time to expand our <b>Trustlet Tribe</b>! &lt;&lt;pause for cringe&gt;&gt;</p>
-
-<p>Here is some text you can send to your Amsterdam groups if you feel like it:
-<em>"My amazing friend developed a free app (https://trustlet.streamlit.app/) linking together Amsterdam lets and visitors within a friends of friends network. Use my email as the inviter [to_email]."</em></p>
-
-<p>I've also just added what I think is a very important feature - <b>New Listing Alerts</b>.
-This is so that users can be notified if a listing is added that matches their filters, instead of needing to re-check the app.
-You can find it under "Browse Listings".</p>
-
-<p>Have a lovely weekend<br>
-Zuk</p>
-
-<p><small>P.S I will only rarely send an email like this to all users, but if you never want to receive anything like it again, reply with "Nee Bedankt".</small></p>
-"""
-
-def render_body_for(to_email: str) -> str:
-    """Personalize the BODY_TEMPLATE with the recipient's email."""
-    return BODY_TEMPLATE.replace("[to_email]", to_email)
+# Subject, HTML and text live in email_templates.py ("announcement");
+# {{ to_email }} there is replaced with each recipient's address
+TEMPLATE = "announcement"
 
 # -------------------------------
 # Build recipient list
@@ -110,10 +94,11 @@ else:
 # Send loop
 # -------------------------------
 print(f"Total recipients: {len(recipients)}")
-for idx, email in enumerate(recipients, start=1):
+# Render every recipient up front against the once-compiled template
+rendered = email_templates.render_batch(TEMPLATE, [{"to_email": e} for e in recipients])
+for idx, (email, (subject, body, text)) in enumerate(zip(recipients, rendered), start=1):
     try:
-        body = render_body_for(email)
-        send_email(email, SUBJECT, body)
+        send_email(email, subject, body, text)
         print(f"[{idx}/{len(recipients)}] ✅ Sent to {email}")
     except Exception as e:
         print(f"[{idx}/{len(recipients)}] ❌ FAILED for {email}: {e}")
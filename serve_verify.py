@@ -0,0 +1,54 @@
+# serve_verify.py
+# Static email-verification landing page, without a Streamlit runtime.
+#
+# Run with:
+#   python serve_verify.py --build          # regenerate static/verify/index.html
+#   python serve_verify.py                  # serve it on $PORT (default 8000)
+#
+# New users land here from the Supabase confirmation link (signup's
+# email_redirect_to). A Streamlit app has to cold-boot a whole server before
+# they see anything; the prebuilt page is served instantly by this script or by
+# any CDN / file host. Point the `verify_url` secret at wherever it is hosted.
+
+import argparse
+import functools
+import os
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from verify_content import render_html
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "verify")
+
+
+def build(out_dir=STATIC_DIR):
+    """Write index.html for the verification page and return its path."""
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, "index.html")
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write(render_html())
+    return path
+
+
+def serve(port, directory=STATIC_DIR):
+    handler = functools.partial(SimpleHTTPRequestHandler, directory=directory)
+    with ThreadingHTTPServer(("", port), handler) as httpd:
+        print(f"Serving {directory} on http://localhost:{port}/")
+        httpd.serve_forever()
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Build or serve the static email-verified page.")
+    p.add_argument("--build", action="store_true", help="Regenerate index.html and exit")
+    p.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8000)))
+    args = p.parse_args(argv)
+
+    if args.build:
+        print(f"Wrote {build()}")
+        return
+    if not os.path.exists(os.path.join(STATIC_DIR, "index.html")):
+        build()
+    serve(args.port)
+
+
+if __name__ == "__main__":
+    main()
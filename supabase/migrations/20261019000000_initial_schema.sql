@@ -0,0 +1,55 @@
+-- Initial schema: the four tables trustlet_app.py reads and writes.
+--
+-- Written to match the columns the app uses (see models.py), with
+-- "if not exists" so an existing project can adopt it without changes
+-- (or mark it applied with `supabase migration repair`).
+--
+-- users.id is the Supabase Auth user id. The foreign key to auth.users is
+-- left out so the schema also loads into a plain Postgres
+-- (see check_query_plans.py).
+
+create table if not exists public.users (
+    id          uuid primary key,
+    name        text not null,
+    email       text not null,
+    invited_by  uuid references public.users (id) on delete set null,
+    is_active   boolean not null default false,
+    created_at  timestamptz not null default now()
+);
+
+create table if not exists public.listings (
+    id          bigint generated by default as identity primary key,
+    user_id     uuid not null references public.users (id) on delete cascade,
+    title       text not null default 'Untitled listing',
+    home_type   text not null,
+    bedrooms    integer not null default 1,
+    location    text not null,
+    street_name text,
+    cost        numeric not null default 0,
+    start_date  date not null,
+    end_date    date not null,
+    photo_link  text,
+    is_active   boolean not null default true,
+    created_at  timestamptz not null default now()
+);
+
+create table if not exists public.messages (
+    id           bigint generated by default as identity primary key,
+    sender_id    uuid not null references public.users (id) on delete cascade,
+    receiver_id  uuid not null references public.users (id) on delete cascade,
+    listing_id   bigint references public.listings (id) on delete set null,
+    content      text not null default '',
+    message_type text not null default 'uncategorized',
+    status       text not null default 'sent',
+    is_active    boolean not null default true,
+    created_at   timestamptz not null default now()
+);
+
+create table if not exists public.alerts (
+    id          bigint generated by default as identity primary key,
+    user_id     uuid not null references public.users (id) on delete cascade,
+    title       text not null default 'Listing alert',
+    filters     jsonb not null default '{}'::jsonb,
+    is_active   boolean not null default true,
+    created_at  timestamptz not null default now()
+);
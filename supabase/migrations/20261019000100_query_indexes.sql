@@ -0,0 +1,39 @@
+-- Indexes for the queries issued by trustlet_app.py and export_data.py.
+-- check_query_plans.py asserts (via EXPLAIN) that each selective query uses them.
+--
+-- Deliberately not indexed: the reads that return (nearly) every row of a
+-- table, where a sequential scan is the right plan: the trust graph
+-- (users where is_active), the beta counter (count of users) and the alert
+-- matcher (alerts where is_active; every alert is created active).
+
+-- signup: inviter lookup by email. Not unique: Supabase Auth already keeps
+-- emails unique, and a unique index would fail to build on a table that has
+-- picked up duplicates (e.g. from manual edits).
+create index if not exists users_email_idx
+    on public.users (email);
+
+-- Browse Listings (and the active-listings snapshot behind search and alert
+-- counts): only active listings are ever browsed, ordered by start date; the
+-- neighbourhood filter is the most selective one
+create index if not exists listings_active_start_date_idx
+    on public.listings (start_date) where is_active;
+create index if not exists listings_active_location_start_date_idx
+    on public.listings (location, start_date) where is_active;
+
+-- Add/Remove Listings: the owner's listings, newest first
+create index if not exists listings_user_id_created_at_idx
+    on public.listings (user_id, created_at desc);
+
+-- Messages: the inbox (active messages to a user, newest first)
+create index if not exists messages_inbox_idx
+    on public.messages (receiver_id, created_at desc) where is_active;
+
+-- Manage alerts: the user's alerts, newest first
+create index if not exists alerts_user_id_created_at_idx
+    on public.alerts (user_id, created_at desc);
+
+-- export_data.py: keyset pagination on (created_at, id)
+create index if not exists users_created_at_id_idx on public.users (created_at, id);
+create index if not exists listings_created_at_id_idx on public.listings (created_at, id);
+create index if not exists messages_created_at_id_idx on public.messages (created_at, id);
+create index if not exists alerts_created_at_id_idx on public.alerts (created_at, id);
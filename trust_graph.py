@@ -0,0 +1,150 @@
+# trust_graph.py
+# In-memory index over the users.invited_by chain.
+#
+# Every member was invited by exactly one existing member, so the trust network
+# is a forest: each user's parent is their inviter. Degrees of separation between
+# two members is the length of the tree path between them, i.e.
+#   depth(a) + depth(b) - 2 * depth(lowest common ancestor)
+# We keep each node's depth plus a binary-lifting table of its 2^k-th ancestors,
+# which answers distance / first-hop queries in O(log n) without touching the
+# database. Approving an invite only ever adds a leaf, which is O(log n) as well.
+# Queries don't lock; add_user() publishes a new member only once fully inserted.
+
+import threading
+
+
+class TrustGraph:
+    """Degrees of separation and connection paths over the invite forest."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._names = {}     # user_id -> display name
+        self._depth = {}     # user_id -> distance from the root of its tree
+        self._up = {}        # user_id -> [parent, grandparent, 4th ancestor, ...]
+        self._root = {}      # user_id -> id of the root of its tree
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        Build from `users` rows with at least `id` and `invited_by` (and optionally `name`).
+
+        Rows may come in any order. A user whose inviter is missing from `rows`
+        starts a tree of their own.
+        """
+        graph = cls()
+        by_id = {r["id"]: r for r in rows}
+        children = {}
+        roots = []
+        for r in rows:
+            parent = r.get("invited_by")
+            if parent in by_id and parent != r["id"]:
+                children.setdefault(parent, []).append(r["id"])
+            else:
+                roots.append(r["id"])
+
+        # Insert parents before children so every insertion is a leaf insertion
+        stack = list(roots)
+        while stack:
+            uid = stack.pop()
+            if uid in graph._depth:
+                continue
+            r = by_id[uid]
+            parent = r.get("invited_by") if r.get("invited_by") in graph._depth else None
+            graph._insert(uid, parent, r.get("name"))
+            stack.extend(children.get(uid, []))
+        return graph
+
+    def __contains__(self, user_id):
+        return user_id in self._depth
+
+    def __len__(self):
+        return len(self._depth)
+
+    def name(self, user_id):
+        return self._names.get(user_id)
+
+    # -------------------------------
+    # Updates
+    # -------------------------------
+    def add_user(self, user_id, invited_by=None, name=None):
+        """Add a newly approved member as a child of their inviter (no-op if already present)."""
+        with self._lock:
+            if user_id in self._depth:
+                if name:
+                    self._names[user_id] = name
+                return
+            self._insert(user_id, invited_by if invited_by in self._depth else None, name)
+
+    def _insert(self, user_id, parent, name):
+        # Readers don't take the lock: they check `user_id in self._depth` and then
+        # read _up / _root, so _depth must be written last, once the rest is in place.
+        self._names[user_id] = name
+        if parent is None:
+            self._up[user_id] = []
+            self._root[user_id] = user_id
+            self._depth[user_id] = 0
+            return
+
+        up = [parent]
+        k = 0
+        while k < len(self._up[up[k]]):
+            up.append(self._up[up[k]][k])
+            k += 1
+        self._up[user_id] = up
+        self._root[user_id] = self._root[parent]
+        self._depth[user_id] = self._depth[parent] + 1
+
+    # -------------------------------
+    # Queries
+    # -------------------------------
+    def _ancestor(self, user_id, steps):
+        """The ancestor `steps` levels above `user_id`."""
+        k = 0
+        while steps:
+            if steps & 1:
+                user_id = self._up[user_id][k]
+            steps >>= 1
+            k += 1
+        return user_id
+
+    def _lca(self, a, b):
+        if self._depth[a] < self._depth[b]:
+            a, b = b, a
+        a = self._ancestor(a, self._depth[a] - self._depth[b])
+        if a == b:
+            return a
+        for k in range(len(self._up[a]) - 1, -1, -1):
+            if k < len(self._up[a]) and self._up[a][k] != self._up[b][k]:
+                a, b = self._up[a][k], self._up[b][k]
+        return self._up[a][0]
+
+    def distance(self, a, b):
+        """Degrees of separation between two members, or None if they are not connected."""
+        if a not in self._depth or b not in self._depth or self._root[a] != self._root[b]:
+            return None
+        lca = self._lca(a, b)
+        return self._depth[a] + self._depth[b] - 2 * self._depth[lca]
+
+    def first_hop(self, a, b):
+        """The member next to `a` on the path from `a` to `b` (None if a == b or not connected)."""
+        if a == b or self.distance(a, b) is None:
+            return None
+        lca = self._lca(a, b)
+        if lca != a:
+            return self._up[a][0]
+        return self._ancestor(b, self._depth[b] - self._depth[a] - 1)
+
+    def path(self, a, b):
+        """User ids on the connection path from `a` to `b` (inclusive), or None if not connected."""
+        if self.distance(a, b) is None:
+            return None
+        lca = self._lca(a, b)
+        up_from_a = [a]
+        while up_from_a[-1] != lca:
+            up_from_a.append(self._up[up_from_a[-1]][0])
+        up_from_b = []
+        node = b
+        while node != lca:
+            up_from_b.append(node)
+            node = self._up[node][0]
+        return up_from_a + up_from_b[::-1]
@@ -1,12 +1,13 @@
 import streamlit as st
-from supabase import create_client, Client
 import json
-from datetime import datetime
-import resend
-import traceback
-import html
-import requests
-import streamlit.components.v1 as components
+import time
+from trust_graph import TrustGraph
+from prefetch import prefetch, resolve
+from query_batch import QueryBatch
+from models import Alert, Listing, Message, User, from_rows
+from entity_state import EntityState
+from listing_search import ListingSearchIndex
+import email_templates
 
 
 
@@ -18,6 +19,7 @@ st.set_page_config(page_title="Trustlet", layout="wide")
 
 
 # Hide Streamlit footer and "Fork/GitHub" badge
+# (re-emitted every rerun on purpose: Streamlit removes elements a rerun doesn't emit)
 hide_streamlit_badge = """
     <style>
     /* Hide Streamlit hamburger menu + footer */
@@ -38,16 +40,47 @@ st.markdown(hide_streamlit_badge, unsafe_allow_html=True)
 
 # ----------------------------------
 # Supabase setup
-# - Prefer Streamlit secrets; fallback to local JSON if you used that earlier
-#   (edit the file path if your local JSON lives elsewhere)
+# - The client (and the supabase package itself) is created on first use and
+#   shared by every session in the process, so a cold start can render the
+#   static parts of the page before paying for the import
+# - Sign-in / sign-up go through a throwaway client (auth_client): supabase-py
+#   switches a client's requests to the JWT of whoever signs in on it, which on
+#   the shared client would run every session's queries as that user
+# - Resend is only imported when the first email is sent (see send_email)
 # ----------------------------------
 
-resend.api_key = st.secrets["resend"]["api_key"]
 SUPABASE_URL = st.secrets["supabase"]["url"]
 SUPABASE_KEY = st.secrets["supabase"]["key"]
 
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+@st.cache_resource
+def get_supabase_client():
+    from supabase import create_client
+    return create_client(SUPABASE_URL, SUPABASE_KEY)
+
+
+class _LazyClient:
+    """Stands in for the Supabase client until its first use in this rerun."""
+
+    def __init__(self):
+        self._client = None
+
+    def __getattr__(self, name):
+        if self._client is None:
+            self._client = get_supabase_client()
+        return getattr(self._client, name)
+
+
+supabase = _LazyClient()
+
+
+def auth_client():
+    """A fresh client for one sign-in / sign-up; never used for data queries."""
+    from supabase import ClientOptions, create_client
+    return create_client(
+        SUPABASE_URL, SUPABASE_KEY,
+        options=ClientOptions(auto_refresh_token=False, persist_session=False),
+    )
 
 # ----------------------------------
 # Session state
@@ -57,6 +90,8 @@ if "user" not in st.session_state:
 
 
 APP_URL = "https://trustlet.streamlit.app"
+# Email-confirmation landing page; point at the static build (serve_verify.py) once it's hosted
+VERIFY_URL = st.secrets.get("verify_url", "https://trustlet-verify.streamlit.app")
 BETA_MAX_USERS = 50
 # ----------------------------------
 # Helpers
@@ -70,11 +105,11 @@ def signup(name, email, password, inviter_email):
         if not inviter.data:
             return False, "Existing user email not found or inactive."
 
-        response = supabase.auth.sign_up({
+        response = auth_client().auth.sign_up({
             "email": email,
             "password": password,
             "options": {
-                "email_redirect_to": "https://trustlet-verify.streamlit.app"
+                "email_redirect_to": VERIFY_URL
             }
         })
 
@@ -118,7 +153,7 @@ def login(email: str, password: str):
     Login via Supabase Auth; enforce users.is_active.
     Store simple dict in session (id, email, name).
     """
-    response = supabase.auth.sign_in_with_password({
+    response = auth_client().auth.sign_in_with_password({
         "email": email,
         "password": password
     })
@@ -135,99 +170,31 @@ def login(email: str, password: str):
             }
     return None
 
-def send_email(to_email: str, subject: str, body: str):
+def send_email(to_email: str, subject: str, body: str, text: str | None = None):
     try:
+        import resend  # loaded on first send, keeps it out of the cold start
+        resend.api_key = st.secrets["resend"]["api_key"]
         payload = {
             "from": f"Trustlet Team <{st.secrets['resend']['from_email']}>",
             "to": [to_email],
             "subject": subject,
             "html": body
         }
+        if text:
+            payload["text"] = text  # plain-text part, helps deliverability
         #st.write("📤 Email payload:", payload)  # Debug payload
         result = resend.Emails.send(payload)
         #st.write("📧 Email API result:", result)
     except Exception as e:
+        import traceback
         st.error(f"Email failed: {e}")
         st.text(traceback.format_exc())
 
 
 
 def build_email(message_type, context=None, content=""):
-    if message_type == "invite_request":
-        return (
-            "New membership request on Trustlet",
-            f"<p>{content}</p>"
-            f"<p>Log into "
-            f"<a href='{APP_URL}'>Trustlet</a> and select <b>Messages</b> from the dropdown menu.</p>"
-        )
-    elif message_type == "inquiry":
-        sender_name = context.get("sender_name", "A Trustlet member")
-        listing_title = context.get("listing_title", "your listing")
-
-        return (
-            f"New inquiry about your listing '{listing_title}'",
-            f"""
-            <h3>📩 New Inquiry</h3>
-            <p><strong>From:</strong> {sender_name}</p>
-            
-            <p><em>{content}</em></p>
-
-            <hr>
-            <p>To reply or view details, go to your 
-            <a href="{APP_URL}">Trustlet inbox</a>.</p>
-            """
-        )
-
-    elif message_type == "reply":
-        sender_name = context.get("sender_name", "A Trustlet member")
-
-        return (
-            "You received a reply on Trustlet",
-            f"""
-            <h3>💬 New Reply</h3>
-            <p><strong>From:</strong> {sender_name}</p>
-
-            <p><em>{content}</em></p>
-
-
-            <hr>
-            <p>To reply or view the full conversation, go to your 
-            <a href="{APP_URL}">Trustlet inbox</a>.</p>
-            """
-        )
-        
-    elif message_type == "system":
-        return (
-            "Trustlet notification",
-            f"<p>{content}</p>"
-            f"<p>You can view this update in your "
-            f"<a href='{APP_URL}'>Trustlet inbox</a>.</p>"
-        )
-
-
-    elif message_type == "alert":
-        listing_title = context.get("listing_title", "a new listing")
-        return (
-            f"New listing that matches your alert: {listing_title}",
-            f"""
-            <h3>📢 New listing alert</h3>
-            <p>{content}</p>
-            <hr>
-            <p>To change or turn off alerts, open the app and go to
-            <b>Messages → Manage alerts</b>.</p>
-            <p><a href="{APP_URL}">Open Trustlet</a></p>
-            """
-        )
-
-    else:
-        return (
-            "New message in Trustlet inbox",
-            f"<p>{content}</p>"
-            f"<p>Check your <a href='{APP_URL}'>Trustlet inbox</a> for details.</p>"
-        )
-
-
-
+    """(subject, html, text) for a message, from the shared registry in email_templates.py."""
+    return email_templates.render(message_type, content=content, app_url=APP_URL, **(context or {}))
 
 
 def create_message(
@@ -239,13 +206,14 @@ def create_message(
     context=None,
     email_subject=None,
     email_body=None,
-    listing_id=None
+    listing_id=None,
+    email_template=None
 ):
     """
     Create a message in the database and send an email notification.
 
     - Inserts the message into `messages`
-    - Builds email subject/body via build_email
+    - Builds email subject/body via build_email (template `email_template`, default: message_type)
 
     """
     if context is None:
@@ -299,14 +267,15 @@ def create_message(
             context["sender_name"] = sender.data[0]["name"]
 
         # Build email subject + body
-        subject, body = build_email(message_type, context, content)
+        subject, body, text = build_email(email_template or message_type, context, content)
 
-        # Allow overrides
+        # Allow overrides (a custom HTML body has no matching text part)
         subject = email_subject or subject
-        body = email_body or body
+        if email_body:
+            body, text = email_body, None
 
         # Send email
-        send_email(to_email, subject, body)
+        send_email(to_email, subject, body, text)
 
         return msg.data[0]
 
@@ -331,41 +300,275 @@ def create_alert(user_id, title, filters, is_active=True):
         "is_active": True,   # always true; not exposed in UI
     }).execute()
 
-def fetch_user_alerts(user_id):
-    return supabase.table("alerts").select("*").eq("user_id", user_id).order("created_at", desc=True).execute()
+# The fetch_* helpers return lists of models (see models.py), parsed once per load.
+# `client` is for callers on worker threads (see start_prefetch); default: the shared client.
+def fetch_user_alerts(user_id, client=None):
+    rows = (client or supabase).table("alerts").select("*").eq("user_id", user_id).order("created_at", desc=True).execute()
+    return from_rows(Alert, rows.data)
+
+def fetch_inbox(user_id, client=None):
+    # Only fetch active messages; handled invite requests will be hidden by status != 'pending'
+    rows = (client or supabase).table("messages").select("*") \
+        .eq("receiver_id", user_id).eq("is_active", True) \
+        .order("created_at", desc=True).execute()
+    return from_rows(Message, rows.data)
+
+def fetch_user_listings(user_id, client=None):
+    rows = (client or supabase).table("listings").select("*").eq("user_id", user_id).order("created_at", desc=True).execute()
+    return from_rows(Listing, rows.data)
+
+def fetch_browse_listings(filters, client=None):
+    """Active listings matching a current_filter_payload() dict, earliest start first."""
+    query = (client or supabase).table("listings").select("*").eq("is_active", True)
+    if filters["suburbs"]:  # only apply if user picked something
+        query = query.in_("location", filters["suburbs"])
+    if filters["home_type"]:
+        query = query.eq("home_type", filters["home_type"])
+    if filters["max_cost"]:
+        query = query.lte("cost", filters["max_cost"])
+    if filters["desired_start"]:
+        # show listings that end after the desired_start
+        query = query.gte("end_date", filters["desired_start"])
+    if filters["desired_end"]:
+        # show listings that start before the desired_end
+        query = query.lte("start_date", filters["desired_end"])
+    return from_rows(Listing, query.order("start_date", desc=False).execute().data)
+
+DEFAULT_BROWSE_FILTERS = current_filter_payload("All", [], 0, None, None)
+
+def browse_cache_key(filters):
+    return ("browse", json.dumps(filters, sort_keys=True))
+
+def fetch_users_by_id(user_ids, columns):
+    """{user_id: User} for the given ids in a single request."""
+    if not user_ids:
+        return {}
+    rows = supabase.table("users").select(f"id, {columns}").in_("id", list(user_ids)).execute()
+    return {u.id: u for u in from_rows(User, rows.data)}
+
+def fetch_listing_titles(listing_ids):
+    """{listing_id: title} for the given ids in a single request."""
+    if not listing_ids:
+        return {}
+    rows = supabase.table("listings").select("id, title").in_("id", list(listing_ids)).execute()
+    return {r["id"]: r["title"] for r in rows.data or []}
+
+# ----------------------------------
+# Login prefetch
+# - start_prefetch() starts the user's likely first reads at login, under keys
+#   whose first item names the data set ("inbox", "browse", ...)
+# - The first load() of a key takes the prefetched result (waiting on its future
+#   if needed); every later load() reads fresh, so new messages and listings
+#   show up on the next rerun as they always have
+# - Results are only used within PREFETCH_MAX_AGE_SECONDS of being started: a
+#   page first opened later (e.g. Messages, an hour after login) loads fresh
+# ----------------------------------
+PREFETCH_MAX_AGE_SECONDS = 5
+
+def _prefetched():
+    """{key: (started_at, value or Future)} for this session, minus entries that are too old to use."""
+    if "prefetched" not in st.session_state:
+        st.session_state.prefetched = {}
+    pending, now = st.session_state.prefetched, time.monotonic()
+    for key in [k for k, (started, _) in pending.items() if now - started > PREFETCH_MAX_AGE_SECONDS]:
+        del pending[key]
+    return pending
+
+_MISS = object()
+
+def _take_prefetched(key):
+    """Remove and return the prefetched value for `key`, or _MISS if there is none or it failed."""
+    entry = _prefetched().pop(key, None)
+    if entry is None:
+        return _MISS
+    try:
+        return resolve(entry[1])
+    except Exception:
+        return _MISS  # prefetch failed; caller loads on demand
+
+def hand_off(key, value):
+    """Make `value` the result of the next load(key), e.g. data this rerun already fetched."""
+    _prefetched()[key] = (time.monotonic(), value)
+
+def load(key, loader):
+    """The prefetched value for `key` the first time, otherwise a fresh `loader()`."""
+    value = _take_prefetched(key)
+    return loader() if value is _MISS else value
+
+def load_many(loaders):
+    """Like load() for several keys at once: whatever wasn't prefetched is loaded concurrently."""
+    results, batch = {}, QueryBatch()
+    for key, loader in loaders.items():
+        value = _take_prefetched(key)
+        if value is _MISS:
+            batch.add(key, loader)
+        else:
+            results[key] = value
+    results.update(batch.run())
+    return results
+
+def invalidate(*names):
+    """Drop not-yet-used prefetched results for the given data sets, e.g. invalidate("inbox", "browse")."""
+    pending = _prefetched()
+    for key in [k for k in pending if k[0] in names]:
+        del pending[key]
+
+def start_prefetch(user_id):
+    """Start loading the user's likely first pages in parallel; pages pick them up via load()."""
+    # Resolved here: the loaders run on pool threads with no ScriptRunContext,
+    # where st.cache_resource (get_supabase_client) would log a warning per call
+    client = get_supabase_client()
+    started = time.monotonic()
+    futures = prefetch({
+        ("inbox",): lambda: fetch_inbox(user_id, client),
+        ("alerts",): lambda: fetch_user_alerts(user_id, client),
+        ("my_listings",): lambda: fetch_user_listings(user_id, client),
+        browse_cache_key(DEFAULT_BROWSE_FILTERS): lambda: fetch_browse_listings(DEFAULT_BROWSE_FILTERS, client),
+    })
+    st.session_state.prefetched = {key: (started, future) for key, future in futures.items()}
+
+# ----------------------------------
+# Lookups by id
+# - Lister / sender names, member-since dates and listing titles hardly ever
+#   change, so each session keeps them for LOOKUP_TTL_SECONDS, keyed by the id
+#   set, instead of fetching and re-parsing them on every rerun
+# ----------------------------------
+LOOKUP_TTL_SECONDS = 300
+LOOKUP_MAX_ENTRIES = 16    # bounds per-session memory
+
+def _lookup_cache():
+    if "lookup_cache" not in st.session_state:
+        st.session_state.lookup_cache = {}
+    return st.session_state.lookup_cache
+
+def users_key(user_ids, columns):
+    return ("users", frozenset(user_ids), columns)
+
+def titles_key(listing_ids):
+    return ("titles", frozenset(listing_ids))
+
+def cached_lookups(keys):
+    """{key: result} for users_key() / titles_key() keys; misses are loaded concurrently."""
+    cache, now = _lookup_cache(), time.monotonic()
+    results, batch = {}, QueryBatch()
+    for key in keys:
+        entry = cache.get(key)
+        if entry and now - entry[0] < LOOKUP_TTL_SECONDS:
+            results[key] = entry[1]
+        elif key[0] == "users":
+            batch.add(key, fetch_users_by_id, key[1], key[2])
+        else:
+            batch.add(key, fetch_listing_titles, key[1])
+    for key, value in batch.run().items():
+        cache[key] = (now, value)
+        results[key] = value
+    if len(cache) > LOOKUP_MAX_ENTRIES:
+        for old in sorted(cache, key=lambda k: cache[k][0])[: len(cache) - LOOKUP_MAX_ENTRIES]:
+            del cache[old]
+    return results
+
+TRUST_GRAPH_TTL_SECONDS = 300   # picks up members activated outside this process
+
+@st.cache_resource(ttl=TRUST_GRAPH_TTL_SECONDS)
+def get_trust_graph():
+    """Process-wide index over the invited_by chain; updated in place when invites are approved here."""
+    users = supabase.table("users").select("id, name, invited_by").eq("is_active", True).execute()
+    return TrustGraph.from_rows(users.data or [])
+
+LISTING_SNAPSHOT_TTL_SECONDS = 60   # picks up listings added or toggled outside this process
+
+@st.cache_resource(ttl=LISTING_SNAPSHOT_TTL_SECONDS)
+def _listing_snapshot():
+    """(version, listings): process-wide snapshot of the active listings, earliest start first."""
+    rows = supabase.table("listings").select("*").eq("is_active", True).order("start_date", desc=False).execute()
+    return time.monotonic_ns(), from_rows(Listing, rows.data)
+
+def get_active_listings():
+    """The active listings in the current snapshot; see refresh_listing_snapshot()."""
+    return _listing_snapshot()[1]
+
+@st.cache_resource(max_entries=1)
+def _listing_index(version, _listings):
+    return ListingSearchIndex(_listings)
+
+def get_listing_index():
+    """Search index over the current snapshot, shared by every session; rebuilt with the snapshot."""
+    version, listings = _listing_snapshot()
+    return _listing_index(version, listings)
+
+@st.cache_resource(max_entries=1)
+def _alert_count_cache(version):
+    """{alert_id: number of listings in snapshot `version` it matches}, shared by every session."""
+    return {}
+
+def refresh_listing_snapshot():
+    """Call after a listing is inserted, activated or deactivated."""
+    _listing_snapshot.clear()
+    _listing_index.clear()
+    _alert_count_cache.clear()
+
+def alert_match_counts(alerts):
+    """
+    {alert_id: match count} for the given Alerts, in one pass over the active listings.
+
+    Counts are kept per snapshot, so they expire with it and agree with search.
+    """
+    version, listings = _listing_snapshot()
+    counts = _alert_count_cache(version)
+    missing = [a for a in alerts if a.id not in counts]
+    if missing:
+        tally = dict.fromkeys((a.id for a in missing), 0)
+        for listing in listings:
+            for a in missing:
+                if a.matches(listing):
+                    tally[a.id] += 1
+        counts.update(tally)
+    return {a.id: counts[a.id] for a in alerts}
+
+def show_alert_matches(alert):
+    """on_click for an alert's "Show matches": open Browse Listings with the alert's filters."""
+    st.session_state.action = "Browse Listings"
+    st.session_state.browse_search = ""
+    st.session_state.browse_home_type = alert.home_type or "All"
+    st.session_state.browse_start = alert.desired_start
+    st.session_state.browse_end = alert.desired_end
+    st.session_state.browse_max_cost = int(alert.max_cost or 0)
+    st.session_state.browse_suburbs = [s for s in ams_neighbourhood_options if s in alert.suburbs]
+    st.session_state.browse_max_hops = "Any"
+
+def trust_label(graph, viewer_id, other_id):
+    """Human-readable trust distance, e.g. '2 hops away via Anna'."""
+    hops = graph.distance(viewer_id, other_id)
+    if hops is None:
+        return "Not connected to you"
+    if hops == 0:
+        return "Your listing"
+    if hops == 1:
+        return "Direct connection"
+    via = graph.name(graph.first_hop(viewer_id, other_id)) or "Unknown"
+    return f"{hops} hops away via {via}"
 
 def notify_matching_alerts_for_listing(listing):
-    """Called right after a new listing is inserted."""
+    """Called right after a new listing (a Listing) is inserted."""
     alerts = supabase.table("alerts").select("*").eq("is_active", True).execute()
-    for a in alerts.data or []:
-        f = a["filters"] or {}
-
+    for a in from_rows(Alert, alerts.data):
         # match against your existing filter semantics
-        if f.get("home_type") and listing["home_type"] != f["home_type"]:
-            continue
-        if f.get("suburbs") and listing["location"] not in f["suburbs"]:
-            continue
-        if f.get("max_cost") and listing["cost"] > f["max_cost"]:
-            continue
-        ds, de = f.get("desired_start"), f.get("desired_end")
-        if ds and listing["end_date"] < ds:
-            continue
-        if de and listing["start_date"] > de:
+        if not a.matches(listing):
             continue
 
         # Send a Message (which emails via create_message)
         content_lines = [
-            f"• {listing['title']} — {listing.get('location','')}",
-            f"• Dates: {listing['start_date']} → {listing['end_date']}",
-            f"• Cost: €{listing['cost']}",
+            f"• {listing.title} — {listing.location}",
+            f"• Dates: {listing.start_iso} → {listing.end_iso}",
+            f"• Cost: €{listing.cost}",
         ]
         create_message(
-            sender_id=listing["user_id"],      # or a dedicated “System” sender id
-            receiver_id=a["user_id"],
-            listing_id=listing["id"],
+            sender_id=listing.user_id,      # or a dedicated “System” sender id
+            receiver_id=a.user_id,
+            listing_id=listing.id,
             content="\n".join(content_lines),
             message_type="alert",
-            context={"listing_title": listing["title"]}
+            context={"listing_title": listing.title}
         )
 
 
@@ -435,7 +638,7 @@ if st.session_state.user is None:
                 st.error("⚠️ Please enter both email and password.")
             else:
                 try:
-                    response = supabase.auth.sign_in_with_password({
+                    response = auth_client().auth.sign_in_with_password({
                         "email": email,
                         "password": password
                     })
@@ -454,6 +657,7 @@ if st.session_state.user is None:
                                 st.warning("⏳ Your account exists but has not yet been activated by an inviter.")
                             else:
                                 st.session_state.user = user_row.data[0]
+                                start_prefetch(user_row.data[0]["id"])
                                 st.success("✅ Logged in successfully!")
                                 st.rerun()
                 except Exception as e:
@@ -462,6 +666,7 @@ if st.session_state.user is None:
 # ---------- Logged-in UI ----------
 else:
     user = st.session_state.user
+    entity_keys = EntityState(st.session_state)   # per-listing/message widget keys, evicted when off screen
 
 
     with st.sidebar:
@@ -469,33 +674,48 @@ else:
         st.write(f"Logged in as {user['email']}")
         if st.button("Logout"):
             st.session_state.user = None
+            st.session_state.prefetched = {}
+            st.session_state.lookup_cache = {}
             st.rerun()
 
     action = st.sidebar.selectbox(
         "Choose Action",
-        ["Browse Listings", "Add/Remove Listings", "Messages"]
+        ["Browse Listings", "Add/Remove Listings", "Messages"],
+        key="action"
     )
 
     # ------------------- Browse Listings -------------------
     if action == "Browse Listings":
         st.subheader("Available Listings")
 
+        search = st.text_input("🔎 Search titles and streets", placeholder="e.g. Jordaan, canal, Prinsengracht",
+                               key="browse_search")
+
         # ---- Filters ----
         col1, col2 = st.columns(2)
         with col1:
-            home_type = st.selectbox("Home Type", ["All", "Room only", "Entire home"])
-            desired_start = st.date_input("Earliest start date", value=None)
-            desired_end = st.date_input("Latest end date", value=None)
+            # keyed so an alert's "Show matches" (Messages page) can preset them
+            home_type = st.selectbox("Home Type", ["All", "Room only", "Entire home"], key="browse_home_type")
+            desired_start = st.date_input("Earliest start date", value=None, key="browse_start")
+            desired_end = st.date_input("Latest end date", value=None, key="browse_end")
         with col2:
-            max_cost = st.number_input("Max cost (€)", min_value=0, value=0)
+            max_cost = st.number_input("Max cost (€)", min_value=0, key="browse_max_cost")  # starts at 0
             suburbs = st.multiselect(
                 "Neighborhood(s)",
-                ams_neighbourhood_options,  # just the list, no "All"
-                default=[]  # start empty
+                ams_neighbourhood_options,  # just the list, no "All"; starts empty
+                key="browse_suburbs"
+            )
+            max_hops = st.selectbox(
+                "Trust distance",
+                ["Any", 1, 2, 3],
+                format_func=lambda h: h if h == "Any" else f"Within {h} hop{'s' if h > 1 else ''}",
+                key="browse_max_hops"
+            )
+            sort_by = st.selectbox(
+                "Sort by",
+                ["Best match", "Start date", "Trust distance"],
+                help="Best match ranks search results; without a search it is the same as Start date."
             )
-
-        # ---- Query base ----
-        query = supabase.table("listings").select("*").eq("is_active", True)
 
 
         if st.button("➕ Create listing alert"):
@@ -519,6 +739,7 @@ else:
             with col_ok:
                 if st.button("Create alert"):
                     create_alert(user['id'], alert_title, f_payload)  # always active
+                    invalidate("alerts")
                     st.success("Alert created")
                     st.session_state.show_alert_modal = False
             with col_cancel:
@@ -528,92 +749,82 @@ else:
 
 
         # Apply filters
-        if suburbs:  # only apply if user picked something
-            query = query.in_("location", suburbs)
-        if home_type != "All":
-            query = query.eq("home_type", home_type)
-        if max_cost > 0:
-            query = query.lte("cost", max_cost)
-        if desired_start and desired_end:
-            query = query.lte("start_date", desired_end.isoformat())
-            query = query.gte("end_date", desired_start.isoformat())
-        elif desired_start:
-            # show listings that end after the desired_start
-            query = query.gte("end_date", desired_start.isoformat())
-        elif desired_end:
-            # show listings that start before the desired_end
-            query = query.lte("start_date", desired_end.isoformat())
-
-        listings = query.order("start_date", desc=False).execute()
+        filters = current_filter_payload(home_type, suburbs, max_cost, desired_start, desired_end)
+        listings = load(browse_cache_key(filters), lambda: fetch_browse_listings(filters))
+
+        # ---- Trust distance (in-memory, no extra queries) ----
+        graph = get_trust_graph()
+        hops = {lst.id: graph.distance(user['id'], lst.user_id) for lst in listings}
+        results = listings
+        if search.strip():
+            # ranked ids from the in-memory index, intersected with the filtered listings
+            scores = dict(get_listing_index().search(search))
+            results = [lst for lst in results if lst.id in scores]
+            if sort_by == "Best match":
+                results = sorted(results, key=lambda lst: -scores[lst.id])
+        if max_hops != "Any":
+            results = [lst for lst in results if hops[lst.id] is not None and hops[lst.id] <= max_hops]
+        if sort_by == "Trust distance":
+            # stable sort keeps start_date order within the same distance
+            results = sorted(results, key=lambda lst: (hops[lst.id] is None, hops[lst.id] or 0))
 
         # ---- Results ----
-        count = len(listings.data or [])
+        count = len(results)
 
         if count == 0:
             st.info("No listings match your filters.")
         else:
             st.success(f"{count} listing{'s' if count > 1 else ''} available")
 
-            for listing in listings.data or []:
-                # Fetch lister info
-                lister = supabase.table("users").select("name, created_at, invited_by").eq("id", listing["user_id"]).execute()
-                lister_name = lister.data[0]["name"] if lister.data else "Unknown"
-                created_at = lister.data[0]["created_at"] if lister.data else None
-
-                member_since = ""
-                if created_at:
-                    member_since = datetime.fromisoformat(created_at.replace("Z","")).strftime("%b %Y")
-
-                st.write(f"**{listing['title']}**")
-                st.caption(f"Listed by {lister_name}. Member since {member_since}")
-
-                st.write(f"🏠 {listing.get('home_type','')} — {listing.get('bedrooms', 1)} bedroom(s)")
-                st.write(f"Location: {listing.get('street_name','')}, {listing['location']}")
-
+            # Lister info for every listing in one request (reused across reruns)
+            listers_key = users_key({lst.user_id for lst in results}, "name, created_at")
+            listers = cached_lookups([listers_key])[listers_key]
 
-                # Parse dates (assuming they are in "YYYY-MM-DD" format)
-                start = datetime.strptime(listing["start_date"], "%Y-%m-%d").date()
-                end = datetime.strptime(listing["end_date"], "%Y-%m-%d").date()
+            for listing in results:
+                lister = listers.get(listing.user_id)
+                lister_name = lister.name if lister else "Unknown"
+                member_since = lister.member_since if lister else ""
 
-                nights = (end - start).days
-                total_cost = listing["cost"]
-                per_night = total_cost / nights if nights > 0 else total_cost
+                st.write(f"**{listing.title}**")
+                st.caption(
+                    f"Listed by {lister_name}. Member since {member_since} · "
+                    f"{trust_label(graph, user['id'], listing.user_id)}"
+                )
 
-                st.write(f"Cost: €{total_cost} (€{per_night:.2f} per night)")
+                st.write(f"🏠 {listing.home_type} — {listing.bedrooms} bedroom(s)")
+                st.write(f"Location: {listing.street_name}, {listing.location}")
 
-
-                #date format to dd/mm for listings
-                start_fmt = datetime.strptime(listing['start_date'], "%Y-%m-%d").strftime("%d/%m/%y")
-                end_fmt = datetime.strptime(listing['end_date'], "%Y-%m-%d").strftime("%d/%m/%y")
-
-                st.write(f"Available: {start_fmt} → {end_fmt}")
-                if listing.get("photo_link"):
-                    st.write(f"Photos: {listing['photo_link']}")
+                # nights, per-night cost and dd/mm/yy dates are precomputed by Listing.from_row
+                st.write(f"Cost: €{listing.cost} (€{listing.per_night:.2f} per night)")
+                st.write(f"Available: {listing.start_fmt} → {listing.end_fmt}")
+                if listing.photo_link:
+                    st.write(f"Photos: {listing.photo_link}")
 
                 # Show a button first
-                if st.button("Send Message", key=f"btn_open_{listing['id']}"):
-                    st.session_state[f"show_msg_{listing['id']}"] = True
+                show_key = entity_keys.key("listing", listing.id, "show_msg")
+                if st.button("Send Message", key=entity_keys.key("listing", listing.id, "open")):
+                    st.session_state[show_key] = True
 
                 # If activated, show the form
-                if st.session_state.get(f"show_msg_{listing['id']}", False):
+                if st.session_state.get(show_key, False):
                     st.info("Send a message to the owner (your email address will be sent)")
                     message_text = st.text_area(
-                        f"Message for listing '{listing['title']}'",
-                        key=f"msg_{listing['id']}",
+                        f"Message for listing '{listing.title}'",
+                        key=entity_keys.key("listing", listing.id, "message"),
                         placeholder="Introduce yourself, dates, etc."
                     )
-                    if st.button("Submit", key=f"send_{listing['id']}"):
+                    if st.button("Submit", key=entity_keys.key("listing", listing.id, "send")):
                         create_message(
                             sender_id=user['id'],
-                            receiver_id=listing['user_id'],
-                            listing_id=listing['id'],
-                            content=f"Inquiry about '{listing['title']}'\n\n{message_text}",
+                            receiver_id=listing.user_id,
+                            listing_id=listing.id,
+                            content=f"Inquiry about '{listing.title}'\n\n{message_text}",
                             message_type="inquiry"
                         )
                         st.success("Message sent!")
 
                         # Hide the form again after sending
-                        st.session_state[f"show_msg_{listing['id']}"] = False
+                        st.session_state[show_key] = False
 
                 st.markdown("---")
     # ------------------- Add/Remove Listings -------------------
@@ -646,37 +857,48 @@ else:
                 "is_active": True
             }).execute()
             st.success("Listing added!")
+            # the user's own alerts may match their new listing, so the inbox can change too
+            invalidate("my_listings", "browse", "inbox")
+            refresh_listing_snapshot()
 
             if res.data:
-                notify_matching_alerts_for_listing(res.data[0])
+                # Alert notifications and the refreshed "mine" list don't depend on each other
+                batch = QueryBatch()
+                batch.add("notify", notify_matching_alerts_for_listing, Listing.from_row(res.data[0]))
+                batch.add("mine", fetch_user_listings, user['id'])
+                hand_off(("my_listings",), batch.run()["mine"])
 
         st.markdown("---")
         st.subheader("Your listings (activate/deactivate)")
 
-        mine = supabase.table("listings").select("*").eq("user_id", user['id']).order("created_at", desc=True).execute()
-        if not mine.data:
+        mine = load(("my_listings",), lambda: fetch_user_listings(user['id']))
+        if not mine:
             st.info("You have no listings yet.")
         else:
-            for lst in mine.data:
+            for lst in mine:
                 cols = st.columns([3, 2, 2, 2, 2])
                 with cols[0]:
-                    st.write(f"**{lst['title']}**")
-                    st.caption(f"{lst.get('home_type','')} — {lst.get('bedrooms',1)} BR — {lst['location']}")
+                    st.write(f"**{lst.title}**")
+                    st.caption(f"{lst.home_type} — {lst.bedrooms} BR — {lst.location}")
                 with cols[1]:
-                    st.write(f"€{lst['cost']}")
+                    st.write(f"€{lst.cost}")
                 with cols[2]:
-                    st.write(f"{lst['start_date']} → {lst['end_date']}")
+                    st.write(f"{lst.start_iso} → {lst.end_iso}")
                 with cols[3]:
-                    st.write("Active ✅" if lst['is_active'] else "Inactive ⛔")
+                    st.write("Active ✅" if lst.is_active else "Inactive ⛔")
                 with cols[4]:
-                    if lst['is_active']:
-                        if st.button("Deactivate", key=f"deact_{lst['id']}"):
-                            supabase.table("listings").update({"is_active": False}).eq("id", lst["id"]).execute()
+                    if lst.is_active:
+                        if st.button("Deactivate", key=entity_keys.key("my_listing", lst.id, "deactivate")):
+                            supabase.table("listings").update({"is_active": False}).eq("id", lst.id).execute()
+                            invalidate("my_listings", "browse")
+                            refresh_listing_snapshot()
                             st.success("Listing deactivated")
                             st.rerun()
                     else:
-                        if st.button("Activate", key=f"act_{lst['id']}"):
-                            supabase.table("listings").update({"is_active": True}).eq("id", lst["id"]).execute()
+                        if st.button("Activate", key=entity_keys.key("my_listing", lst.id, "activate")):
+                            supabase.table("listings").update({"is_active": True}).eq("id", lst.id).execute()
+                            invalidate("my_listings", "browse")
+                            refresh_listing_snapshot()
                             st.success("Listing activated")
                             st.rerun()
 
@@ -684,64 +906,70 @@ else:
     elif action == "Messages":
         st.subheader("Inbox")
 
-        # Only fetch active messages; handled invite requests will be hidden by status != 'pending'
-        inbox = supabase.table("messages").select("*") \
-            .eq("receiver_id", user['id']).eq("is_active", True) \
-            .order("created_at", desc=True).execute()
+        # Inbox and alerts are independent: load them together
+        page_data = load_many({
+            ("inbox",): lambda: fetch_inbox(user['id']),
+            ("alerts",): lambda: fetch_user_alerts(user['id']),
+        })
+        inbox, ua = page_data[("inbox",)], page_data[("alerts",)]
+
+        # Sender and listing lookups for every message, as two concurrent requests (reused across reruns)
+        senders_key = users_key({m.sender_id for m in inbox}, "name, email")
+        listing_titles_key = titles_key({m.listing_id for m in inbox if m.listing_id})
+        found = cached_lookups([senders_key, listing_titles_key])
+        lookups = {"senders": found[senders_key], "titles": found[listing_titles_key]}
 
-        for msg in inbox.data or []:
+        for msg in inbox:
             # Sender info
-            sender = supabase.table("users").select("name,email").eq("id", msg['sender_id']).execute()
-            sender_name = sender.data[0]["name"] if sender.data else "Unknown"
-            sender_email = sender.data[0]["email"] if sender.data else "Unknown"
+            sender = lookups["senders"].get(msg.sender_id)
+            sender_name = sender.name if sender else "Unknown"
+            sender_email = sender.email if sender else "Unknown"
 
             # INVITE REQUESTS
-            if msg.get("message_type") == "invite_request":
+            if msg.message_type == "invite_request":
                 # Only show pending requests
-                if msg.get("status") != "pending":
+                if msg.status != "pending":
                     continue
 
                 st.write(f"Membership request from {sender_name} ({sender_email})")
                 c1, c2, c3 = st.columns(3)
 
                 with c1:
-                    if st.button(f"Approve {sender_email}", key=f"approve_{msg['id']}"):
+                    if st.button(f"Approve {sender_email}", key=entity_keys.key("message", msg.id, "approve")):
                         # Activate user + update invite request
                         supabase.table("users").update({"is_active": True}) \
-                            .eq("id", msg["sender_id"]).execute()
+                            .eq("id", msg.sender_id).execute()
                         supabase.table("messages").update({"status": "approved"}) \
-                            .eq("id", msg["id"]).execute()
+                            .eq("id", msg.id).execute()
+                        get_trust_graph().add_user(msg.sender_id, user['id'], sender_name)
+                        invalidate("inbox")
 
                         # Insert a welcome system message
                         create_message(
                             sender_id=user['id'],
-                            receiver_id=msg["sender_id"],
+                            receiver_id=msg.sender_id,
                             content="✅ Your membership request has been approved. Welcome to Trustlet!",
                             message_type="system",
                             status="sent",
-                            email_subject="🎉 Welcome to Trustlet – Your membership has been approved!",
-                            email_body=f"""
-                                <p>Hi there,</p>
-                                <p>Good news – your membership request has been <strong>approved</strong> 🎉</p>
-                                <p>You can now <a href="https://trustlet.streamlit.app">log in to Trustlet</a>.</p>
-                                <p>The Trustlet Team</p>
-                            """
+                            email_template="welcome"
                         )
                         st.success(f"Approved {sender_email}")
                         st.rerun()
 
                 with c2:
-                    if st.button(f"Reject {sender_email}", key=f"reject_{msg['id']}"):
+                    if st.button(f"Reject {sender_email}", key=entity_keys.key("message", msg.id, "reject")):
                         # Optional: deactivate user on rejection
-                        supabase.table("users").update({"is_active": False}).eq("id", msg["sender_id"]).execute()
-                        supabase.table("messages").update({"status": "rejected"}).eq("id", msg["id"]).execute()
+                        supabase.table("users").update({"is_active": False}).eq("id", msg.sender_id).execute()
+                        supabase.table("messages").update({"status": "rejected"}).eq("id", msg.id).execute()
+                        invalidate("inbox")
                         st.info(f"Rejected {sender_email}")
                         st.rerun()
 
                 with c3:
-                    if st.button("Delete", key=f"del_{msg['id']}"):
+                    if st.button("Delete", key=entity_keys.key("message", msg.id, "delete_invite")):
                         supabase.table("messages").update({"is_active": False}) \
-                            .eq("id", msg["id"]).execute()
+                            .eq("id", msg.id).execute()
+                        invalidate("inbox")
                         st.success("Removed from inbox")
                         st.rerun()
 
@@ -749,31 +977,31 @@ else:
             else:
                 # Show listing title context if present
                 title_line = ""
-                if msg.get("listing_id"):
-                    lst = supabase.table("listings").select("title").eq("id", msg["listing_id"]).execute()
-                    if lst.data:
-                        title_line = f" — regarding **{lst.data[0]['title']}**"
+                if msg.listing_id in lookups["titles"]:
+                    title_line = f" — regarding **{lookups['titles'][msg.listing_id]}**"
 
                 st.write(f"From: {sender_name} ({sender_email}){title_line}")
-                st.write(msg["content"])
+                st.write(msg.content)
 
                 # Reply + Delete actions
-                reply_text = st.text_area("Reply", key=f"reply_{msg['id']}", placeholder="Type your reply…")
+                reply_text = st.text_area("Reply", key=entity_keys.key("message", msg.id, "reply"), placeholder="Type your reply…")
                 r1, r2 = st.columns(2)
                 with r1:
-                    if st.button("Reply", key=f"send_reply_{msg['id']}"):
+                    if st.button("Reply", key=entity_keys.key("message", msg.id, "send_reply")):
                         create_message(
                             sender_id=user['id'],
-                            receiver_id=msg['sender_id'],
-                            listing_id=msg.get("listing_id"),
+                            receiver_id=msg.sender_id,
+                            listing_id=msg.listing_id,
                             content=reply_text,
                             message_type="reply",
                         )
+                        invalidate("inbox")
                         st.success("Reply sent")
                         st.rerun()
                 with r2:
-                    if st.button("Delete", key=f"delete_{msg['id']}"):
-                        supabase.table("messages").update({"is_active": False}).eq("id", msg["id"]).execute()
+                    if st.button("Delete", key=entity_keys.key("message", msg.id, "delete")):
+                        supabase.table("messages").update({"is_active": False}).eq("id", msg.id).execute()
+                        invalidate("inbox")
                         st.success("Message removed from inbox")
                         st.rerun()
 
@@ -791,20 +1019,32 @@ else:
             if ds or de: parts.append(f"Dates: {ds or 'Any'} → {de or 'Any'}")
             return " · ".join(parts) or "Any listing"
 
-        ua = fetch_user_alerts(user['id'])
-        if not ua.data:
+        if not ua:
             st.caption("You have no alerts yet. Create one from **Browse Listings → Create listing alert**.")
         else:
-            for a in ua.data:
-                cols = st.columns([8, 2])
+            match_counts = alert_match_counts(ua)
+            for a in ua:
+                cols = st.columns([6, 2, 2])
                 with cols[0]:
-                    st.write(f"**{a.get('title','Listing alert')}**")
-                    st.caption(_summarize_filters(a.get('filters', {})))
+                    st.write(f"**{a.title}**")
+                    st.caption(_summarize_filters(a.filters))
                 with cols[1]:
-                    if st.button("Delete", key=f"del_alert_{a['id']}"):
-                        supabase.table("alerts").delete().eq("id", a["id"]).execute()
+                    n = match_counts[a.id]
+                    st.button(
+                        f"🔍 Show {n} match{'es' if n != 1 else ''}",
+                        key=entity_keys.key("alert", a.id, "show_matches"),
+                        on_click=show_alert_matches, args=(a,),
+                        disabled=n == 0
+                    )
+                with cols[2]:
+                    if st.button("Delete", key=entity_keys.key("alert", a.id, "delete")):
+                        supabase.table("alerts").delete().eq("id", a.id).execute()
+                        invalidate("alerts")
                         st.rerun()
 
+    # Drop widget keys of listings/messages that are no longer on screen
+    entity_keys.collect()
+
 
 #st.markdown("---")
 st.markdown("---")
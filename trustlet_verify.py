@@ -1,31 +1,26 @@
 import streamlit as st
 
-st.set_page_config(page_title="Trustlet - Email Verified")
+from verify_content import APP_URL, BUTTON_LABEL, INTRO, NOTES, PAGE_TITLE, TITLE, note_markdown
 
-APP_URL = "https://trustlet.streamlit.app"
+# Same content is prebuilt as static HTML in static/verify/index.html
+# (python serve_verify.py --build), which doesn't need a Streamlit server.
 
-st.title("✅ Email Verified")
+st.set_page_config(page_title=PAGE_TITLE)
+
+st.title(TITLE)
 
 st.markdown(
-    """
+    f"""
     <p style="font-size:18px;">
-    Your email has been successfully verified.
+    {INTRO}
     </p>
     """,
     unsafe_allow_html=True
 )
 
-st.info(
-    "🆕 **If you just signed up as a new user:**\n\n"
-    "- Please wait for an existing Trustlet member to approve your application.\n"
-    "- You will receive another email once your membership is approved (it might go to your SPAM folder).\n"
-)
-
-st.success(
-    "🔑 **If you were resetting your password or logging in with a magic link:**\n\n"
-    "- You can now continue directly to Trustlet."
-)
+for style, icon, heading, bullets in NOTES:
+    getattr(st, style)(note_markdown(icon, heading, bullets))
 
 # Always include a button back to main app
-if st.button("🚀 Go to Trustlet"):
+if st.button(BUTTON_LABEL):
     st.markdown(f"[Click here to open Trustlet]({APP_URL})", unsafe_allow_html=True)
@@ -0,0 +1,80 @@
+# verify_content.py
+# Content of the email-verification landing page (the Supabase `email_redirect_to`
+# target set in signup), shared by the Streamlit page (trustlet_verify.py) and
+# the prebuilt static page (static/verify/index.html, see serve_verify.py).
+
+import html
+
+APP_URL = "https://trustlet.streamlit.app"
+
+PAGE_TITLE = "Trustlet - Email Verified"
+TITLE = "✅ Email Verified"
+INTRO = "Your email has been successfully verified."
+BUTTON_LABEL = "🚀 Go to Trustlet"
+
+# (style, icon, heading, bullet points); style is the Streamlit callout used
+NOTES = [
+    (
+        "info",
+        "🆕",
+        "If you just signed up as a new user:",
+        [
+            "Please wait for an existing Trustlet member to approve your application.",
+            "You will receive another email once your membership is approved (it might go to your SPAM folder).",
+        ],
+    ),
+    (
+        "success",
+        "🔑",
+        "If you were resetting your password or logging in with a magic link:",
+        [
+            "You can now continue directly to Trustlet.",
+        ],
+    ),
+]
+
+
+def note_markdown(icon, heading, bullets):
+    """A note as the Markdown shown in st.info / st.success."""
+    return f"{icon} **{heading}**\n\n" + "".join(f"- {b}\n" for b in bullets)
+
+
+_CSS = """
+body { font-family: "Source Sans Pro", -apple-system, BlinkMacSystemFont, "Segoe UI", sans-serif;
+       color: #31333f; max-width: 46rem; margin: 0 auto; padding: 4rem 1rem; line-height: 1.6; }
+h1 { font-size: 2.75rem; margin: 0 0 1rem; }
+.intro { font-size: 18px; }
+.note { border-radius: 0.5rem; padding: 1rem; margin: 1rem 0; }
+.note p { margin: 0 0 0.5rem; }
+.note ul { margin: 0; padding-left: 1.5rem; }
+.info { background: #e8f0fe; color: #1e3a8a; }
+.success { background: #e6f4ea; color: #14532d; }
+.button { display: inline-block; padding: 0.5rem 1rem; border: 1px solid #d0d3da; border-radius: 0.5rem;
+          color: inherit; text-decoration: none; }
+.button:hover { border-color: #ff4b4b; color: #ff4b4b; }
+"""
+
+
+def render_html():
+    """The whole page as a standalone HTML document (no Streamlit runtime needed)."""
+    esc = html.escape
+    notes = "".join(
+        f'<div class="note {style}"><p>{esc(icon)} <strong>{esc(heading)}</strong></p><ul>'
+        + "".join(f"<li>{esc(b)}</li>" for b in bullets)
+        + "</ul></div>\n"
+        for style, icon, heading, bullets in NOTES
+    )
+    return (
+        "<!DOCTYPE html>\n"
+        '<html lang="en">\n<head>\n'
+        '<meta charset="utf-8">\n'
+        '<meta name="viewport" content="width=device-width, initial-scale=1">\n'
+        f"<title>{esc(PAGE_TITLE)}</title>\n"
+        f"<style>{_CSS}</style>\n"
+        "</head>\n<body>\n"
+        f"<h1>{esc(TITLE)}</h1>\n"
+        f'<p class="intro">{esc(INTRO)}</p>\n'
+        f"{notes}"
+        f'<p><a class="button" href="{esc(APP_URL)}">{esc(BUTTON_LABEL)}</a></p>\n'
+        "</body>\n</html>\n"
+    )